@@ -1,8 +1,15 @@
 from dataclasses import dataclass, field
 from enum import Enum
-import re
-from itertools import count
+from functools import cached_property
+from typing import Iterator
 import os
+import time
+from emmet import AttributeSetNode, ClassNode, ParentNode, parse_emmet
+from output import is_unchanged, read_existing, write_if_changed
+from layout import ClassLayout, compute_layout, load_abi, optimise_order
+from cpptypes import ACCESSOR_POLICIES, const_reference, is_trivial, parse_type, split_cv, user_type_uses
+import profiling
+from profiling import ClassProfile, timed_stage
 
 
 class Inheritance(Enum):
@@ -18,8 +25,43 @@ class Attribute:
     type: str
     setter: bool
     getter: bool
-    index: int = field(default_factory=lambda counter=count()
-                       : next(counter), init=False)
+    index: int
+    # Whether the getter and setter are defined in the class body
+    inline: bool = False
+
+
+@dataclass(repr=True, slots=True)
+class AttributeGroup:
+    """Class to represent a run of attributes with the same type, getters and setters, e.g. `4int`. The individual
+    Attribute objects are only created when the group is iterated, so the model grows with the number of groups, not members."""
+    type: str
+    count: int
+    getter: bool
+    setter: bool
+    start_index: int
+    inline: bool = False
+
+    def __iter__(self) -> Iterator[Attribute]:
+        for index in range(self.start_index, self.start_index + self.count):
+            yield Attribute(self.type, self.setter, self.getter, index, self.inline)
+
+
+@dataclass(repr=True)
+class RenderPlan:
+    """Class to represent the parts of a class's output that are shared by its `.hpp` and `.cpp` files."""
+    includes: list[str]
+    namespaces: list[str]
+    # Includes of parent classes and of member classes that must be complete in the header
+    parent_includes: list[str]
+    method_definitions: dict[str, list[str]]
+    # Attribute groups in the order their members are declared
+    member_groups: list[AttributeGroup]
+    # Estimated layout of the members, if layout optimisation is enabled
+    layout: ClassLayout | None = None
+    # Member classes that are only used through pointers, declared as `class Foo;` in the header
+    forward_declarations: list[str] = field(default_factory=list)
+    # Includes of the forward declared classes, for the `.cpp`
+    source_includes: list[str] = field(default_factory=list)
 
 
 @dataclass(repr=True)
@@ -31,181 +73,268 @@ class ParentClass:
     position: int
 
 
+# Bump whenever the generated output changes, as it is part of the incremental generation cache key
+GENERATOR_VERSION = "2.1"
+
+STD_TYPE_INCLUDE_ASSOCIATION = {
+    "string": "#include <string>",
+    "vector": "#include <vector>",
+    "unique_ptr": "#include <memory>",
+    "shared_ptr": "#include <memory>",
+    "weak_ptr": "#include <memory>",
+}
+# Add types that use namespaces other than `std::` here (will need to add in both 'namespace::type' and 'type' format)
+NON_STD_TYPE_INCLUDE_ASSOCIATION = {}
+# Lookup table of every type name that needs an include, with and without `std::`
+TYPE_INCLUDE_ASSOCIATION = {
+    **STD_TYPE_INCLUDE_ASSOCIATION,
+    **{f"std::{type_name}": include for type_name, include in STD_TYPE_INCLUDE_ASSOCIATION.items()},
+    **NON_STD_TYPE_INCLUDE_ASSOCIATION,
+}
+# Options that change the generated output, and their defaults
+DEFAULT_RENDER_OPTIONS = {
+    # Target ABI to reorder members for to minimise padding (see `layout.ABIS`), or None to keep emmet order
+    "layout": None,
+    # Whether to emit a `static_assert` that the class is no larger than its estimated layout
+    "size_guard": False,
+    # How getters and setters pass members (see `cpptypes.ACCESSOR_POLICIES`)
+    "accessors": "copy",
+    # Names of the classes generated alongside this one (e.g. the rest of the batch), each in `{ClassName}.hpp`. Member
+    # types naming one of them are included or forward declared; other names (e.g. `time_t`) are left as they are
+    "classes": None,
+    # Whether non-template headers also get include guards (template headers always do)
+    "include_guards": False,
+    # Whether to generate a struct-of-arrays container `{ClassName}SoA` alongside the class
+    "soa": False,
+    # Header included in place of the class's std includes (e.g. a shared precompiled header), or None to include them directly
+    "pch_include": None,
+}
+# Fields of CPPClassCreator that the render plan is computed from
+MODEL_FIELDS = {"name", "template", "specialisation", "instantiations",
+                "parents", "attribute_groups", "attribute_count", "render_options"}
+
+INHERITANCE_SYMBOLS = {
+    "+": Inheritance.PUBLIC,
+    "-": Inheritance.PRIVATE,
+    "=": Inheritance.PROTECTED,
+}
+
+
+def confirm_override(file_path: str) -> bool:
+    """Checks if the given file already exists. If it does, it prompts the user to confirm whether to override it or not."""
+    if os.path.exists(file_path):
+        while True:
+            response = input(
+                f"File {file_path} already exists. Do you want to override it? (y/n/exit): ").strip().lower()
+            if response in ['y', 'n']:
+                return response == 'y'
+            elif response == 'exit':
+                print("Exiting without creating files.")
+                exit(1)
+            print("Invalid input. Please enter 'y' or 'n'.")
+    return True
+
+
+def render_options_from(options: dict | None) -> dict:
+    """Returns the render options from a dictionary of options (which may also contain other options, such as `override`),
+    filling in the defaults of any that are missing."""
+    options = options or {}
+    return {key: options.get(key, default) for key, default in DEFAULT_RENDER_OPTIONS.items()}
+
+
 class CPPClassCreator:
     """Class to parse and represent the inheritance and attributes of a C++ class from an emmet description."""
 
-    def __init__(self, desc: str) -> None:
+    def __init__(self, desc: str, options: dict | None = None) -> None:
         # Initialize class attributes
+        self.render_options = render_options_from(options)
+        if self.render_options["accessors"] not in ACCESSOR_POLICIES:
+            raise ValueError(
+                f"Unknown accessor policy {self.render_options['accessors']}. Use one of {', '.join(ACCESSOR_POLICIES)}.")
         self.name = ""
         self.template = False
         self.specialisation = None
+        self.instantiations = []
         self.parents = []
-        self.attributes = []
-        # Parse emmet description into components
-        split_description = desc.split(";")
-        declaration = split_description[0]
-        attribute_sets = split_description[1:]
+        self.attribute_groups = []
+        # Attribute numbering is per class, so classes generated in the same process are independent
+        self.attribute_count = 0
+        self.profile = ClassProfile()
+        # Parse emmet description into components in a single pass
+        start = time.perf_counter()
+        class_node = parse_emmet(desc)
+        parse_seconds = time.perf_counter() - start
         # Get the name of the class
-        self.set_class_name(declaration)
-        self.get_template(declaration)
-        self.set_parent_classes(declaration)
-        self.set_attributes(attribute_sets)
-
-    def set_class_name(self, declaration: str) -> None:
-        """Extract the class name from the declaration string."""
-        # Extract class name from declaration
-        self.name = re.match(r"[a-zA-Z0-9_]+", declaration).group()
-
-    def get_template(self, declaration: str) -> None:
-        """Checks if the class is a template class and extracts the template specialisation if it exists."""
-        # Check if the class is a template class
-        if "<" in declaration and ">" in declaration:
-            self.template = True
-            # Extract the template specialisation
-            start_index = declaration.index("<") + 1
-            end_index = declaration.index(">")
-            # Check whether is a template class or template specialisation
-            if start_index == end_index:
-                self.specialisation = None
-            else:
-                self.specialisation = declaration[start_index:end_index].strip(
-                )
-        else:
-            self.template = False
-            self.specialisation = None
-
-    def set_parent_classes(self, declaration: str) -> None:
-        """Extracts parent classes from the class declaration string, including their inheritance type and whether they are virtual."""
-        # Get the index of every +, =, or - in the declaration
-        parent_start_indicies = [m.start()
-                                 for m in re.finditer(r"[+=-]", declaration)]
-        # Create ParentClass objects for each parent class
-        for i, parent_index in enumerate(parent_start_indicies):
-            inheritance = None
-            name = ""
-            virtual = False
-
-            # Determine the type of inheritance
-            if declaration[parent_index] == "+":
-                inheritance = Inheritance.PUBLIC
-            elif declaration[parent_index] == "-":
-                inheritance = Inheritance.PRIVATE
-            elif declaration[parent_index] == "=":
-                inheritance = Inheritance.PROTECTED
-            else:
+        self.set_class_name(class_node)
+        if profiling.ENABLED:
+            self.profile.record(self.name, "parse", parse_seconds)
+        self.get_template(class_node)
+        self.set_parent_classes(class_node.parents)
+        self.set_attributes(class_node.attribute_sets)
+
+    @timed_stage("name")
+    def set_class_name(self, class_node: ClassNode) -> None:
+        """Sets the class name from the parsed emmet."""
+        self.name = class_node.name
+
+    @timed_stage("template")
+    def get_template(self, class_node: ClassNode) -> None:
+        """Sets whether the class is a template class, its template specialisation if it exists, and the template
+        arguments it is explicitly instantiated with."""
+        self.template = class_node.template
+        self.specialisation = class_node.specialisation
+        self.instantiations = list(class_node.instantiations)
+
+    @timed_stage("parents")
+    def set_parent_classes(self, parent_nodes: list[ParentNode]) -> None:
+        """Creates parent classes from the parsed emmet, including their inheritance type and whether they are virtual."""
+        for i, parent_node in enumerate(parent_nodes):
+            inheritance = INHERITANCE_SYMBOLS.get(parent_node.symbol)
+            if inheritance is None:
                 raise ValueError("Invalid inheritance type")
-            # Get name of parent class and if it is virtual
-            name_section = ""
-            if (i + 1) < len(parent_start_indicies):
-                name_section = declaration[parent_index +
-                                           1:parent_start_indicies[i + 1]]
-            else:
-                name_section = declaration[parent_index + 1:]
+            self.parents.append(ParentClass(
+                parent_node.name, parent_node.virtual, inheritance, i))
+        self.invalidate_render_plan()
 
-            name = name_section.replace("?", "")
-            if "?" in name_section:
-                virtual = True
-
-            self.parents.append(ParentClass(name, virtual, inheritance, i))
-
-    def set_attributes(self, attribute_sets: list[str]) -> None:
-        """Extracts attributes from the attribute sets provided in the class description."""
-        # Parse attribute sets to create Attribute objects
+    @timed_stage("attributes")
+    def set_attributes(self, attribute_sets: list[AttributeSetNode]) -> None:
+        """Creates attribute groups from the attribute sets in the parsed emmet."""
         for attribute_set in attribute_sets:
-            # Determine whether attributes will have getters and/or setters
-            getter = False
-            setter = False
-            if attribute_set[0].isnumeric():
-                # Fix regex match for attribute sets starting with a number
-                attribute_set = " " + attribute_set
-            else:
-                if attribute_set[1].isnumeric():
-                    if attribute_set[0] == "g":
-                        getter = True
-                    elif attribute_set[0] == "s":
-                        setter = True
-                elif attribute_set[2].isnumeric():
-                    getter = True
-                    setter = True
-
-            # Split into attributes by finding the start indicies
-            attribute_start_indicies = [m.start() + 1
-                                        for m in re.finditer(r"(?:^|[^0-9])(\d)", attribute_set)]
-            # Create Attribute objects for each attribute type
-            for i, start_index in enumerate(attribute_start_indicies):
-                # Consider case when number is more than one digit
-                type_start_index = start_index + 1
-                number_length = 1
-                while attribute_set[type_start_index].isdigit():
-                    type_start_index += 1
-                    number_length += 1
-
-                # Get the type of the attribute
-                attribute_type = ""
-                if i + 1 < len(attribute_start_indicies):
-                    attribute_type = attribute_set[type_start_index:
-                                                   attribute_start_indicies[i + 1]]
-                else:
-                    attribute_type = attribute_set[type_start_index:]
-
-                # Create that many Attribute objects for that type
-                for j in range(int(attribute_set[start_index:start_index + number_length])):
-                    self.attributes.append(
-                        Attribute(attribute_type, setter, getter))
+            for group in attribute_set.groups:
+                # Record the run of attributes rather than creating that many Attribute objects
+                self.attribute_groups.append(AttributeGroup(
+                    group.type, group.count, attribute_set.getter, attribute_set.setter, self.attribute_count,
+                    attribute_set.inline))
+                self.attribute_count += group.count
+        self.invalidate_render_plan()
+
+    def iter_attributes(self) -> Iterator[Attribute]:
+        """Yields every attribute of the class in order, expanding the attribute groups as it goes."""
+        for group in self.attribute_groups:
+            yield from group
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        # Replacing part of the model makes the render plan out of date
+        if name in MODEL_FIELDS:
+            self.invalidate_render_plan()
+
+    def invalidate_render_plan(self) -> None:
+        """Discards the cached render plan. Must be called after mutating `parents` or `attribute_groups` in place."""
+        self.__dict__.pop("render_plan", None)
+
+    @cached_property
+    def render_plan(self) -> RenderPlan:
+        """Inclusions and method definitions for the class, computed on first use and shared by the `.hpp` and `.cpp` renderers."""
+        includes, namespaces, parent_includes, forward_declarations, source_includes = self.resolve_inclusions()
+        method_definitions = self.build_method_definitions()
+        self.profile.counters["attributes"] = self.attribute_count
+        self.profile.counters["methods"] = len(method_definitions)
+        self.profile.counters["forward_declarations"] = len(forward_declarations)
+        member_groups = self.attribute_groups
+        class_layout = None
+        if self.render_options["layout"] is not None:
+            member_groups, class_layout = self.plan_layout()
+        return RenderPlan(includes, namespaces, parent_includes, method_definitions, member_groups, class_layout,
+                          forward_declarations, source_includes)
+
+    @timed_stage("layout")
+    def plan_layout(self) -> tuple[list[AttributeGroup], ClassLayout]:
+        """Orders the attribute groups to minimise padding for the target ABI and estimates the resulting layout.
+        Attributes keep their names, so only the order of the member declarations changes."""
+        table = load_abi(self.render_options["layout"])
+        member_groups = optimise_order(self.attribute_groups, table)
+        return member_groups, compute_layout(self.attribute_groups, member_groups, table, bool(self.parents))
 
     def __repr__(self) -> str:
-        return f"ClassDescription(name={self.name}, parents={self.parents}, attributes={self.attributes}, numParents={len(self.parents)}, numAttributes={len(self.attributes)}, template={self.template}, specialisation={self.specialisation})"
+        return f"ClassDescription(name={self.name}, parents={self.parents}, attributeGroups={self.attribute_groups}, numParents={len(self.parents)}, numAttributes={self.attribute_count}, template={self.template}, specialisation={self.specialisation})"
 
     def create_include_guards(self) -> list[str]:
-        """Generates include guards for the class based on whether it is a template class or not. (`#ifndef`, `#define`, `#endif`)"""
-        if self.template:
+        """Generates include guards for the class if it is a template class, or the `include_guards` option is set. (`#ifndef`, `#define`, `#endif`)
+        The struct-of-arrays container's header includes the class's, so the `soa` option also adds them."""
+        if self.template or self.render_options["include_guards"] or self.render_options["soa"]:
             return [f"#ifndef {self.name.upper()}_HPP", f"#define {self.name.upper()}_HPP", "#endif"]
         else:
             return []
 
     def create_inclusions(self) -> tuple[list[str], list[str], list[str]]:
-        """Generates namespace inclusions, and include statements for imported types, and includes of parent classes.
+        """Returns namespace inclusions, and include statements for imported types, and includes of parent classes from the render plan.
         Includes in format `#include <file>`, namespaces in format `using std::type;` and parent includes in format `#include "ParentClass.hpp"`."""
-        namespaces_used = []
-        includes = []
-        parent_includes = []
-        std_type_include_association = {
-            "string": "#include <string>",
-            "vector": "#include <vector>",
-            "unique_ptr": "#include <memory>",
-            "shared_ptr": "#include <memory>",
-            "weak_ptr": "#include <memory>",
-        }
-        # Add types that use namespaces other than `std::` here (will need to add in both 'namespace::type' and 'type' format)
-        non_std_type_include_association = {}
-        type_include_association = {}
-        for type_name in std_type_include_association.keys():
-            type_include_association[type_name] = std_type_include_association[type_name]
-            # Add std:: namespace for these types
-            type_include_association[f"std::{type_name}"] = type_include_association[type_name]
-        for type_name in non_std_type_include_association.keys():
-            type_include_association[type_name] = non_std_type_include_association[type_name]
-        for attribute in self.attributes:
-            attribute: Attribute
-            # Check if attribute needs to be included
-            types = re.split(r"[<>]", attribute.type)
-            for attr_type in types:
-                if attr_type in type_include_association:
+        plan = self.render_plan
+        return plan.includes, plan.namespaces, plan.parent_includes
+
+    def describe_forward_declarations(self) -> str:
+        """Returns a one line report of the member classes forward declared in the header, and so not included by it."""
+        forward_declarations = self.render_plan.forward_declarations
+        names = ", ".join(declaration[len("class "):-1]
+                          for declaration in forward_declarations)
+        count = len(forward_declarations)
+        moved_to = f"moved to {self.name}.cpp" if self.has_source() else "avoided"
+        return f"Includes of {self.name}: forward declared {names}, {count} header include{'s' if count != 1 else ''} {moved_to}"
+
+    def create_forward_declarations(self) -> tuple[list[str], list[str]]:
+        """Returns forward declarations of member classes for the header, in format `class Foo;`, and the includes of those
+        classes for the source file, in format `#include "Foo.hpp"`, from the render plan."""
+        plan = self.render_plan
+        return plan.forward_declarations, plan.source_includes
+
+    @timed_stage("create_inclusions")
+    def resolve_inclusions(self) -> tuple[list[str], list[str], list[str], list[str], list[str]]:
+        """Generates namespace inclusions, and include statements for imported types, includes of parent classes and member
+        classes, forward declarations, and includes of the forward declared classes for the `.cpp`. Only classes listed in the
+        `classes` option are treated as member classes. Those used only through pointers, references, `shared_ptr` or
+        `weak_ptr` are forward declared rather than included by the header.
+        Each is deduplicated with an insertion ordered dict, so the order of first use is kept."""
+        namespaces_used = {}
+        includes = {}
+        parent_includes = {}
+        # Whether each member class needs its definition, in order of first use
+        member_classes = {}
+        template_parameters = ("T",) if self.template and not self.specialisation else ()
+        generated_classes = set(self.render_options["classes"] or ())
+        # Explicit instantiations are declared by the header, which instantiates the class, so their types are treated as members
+        types = [(group.type, group.setter, True) for group in self.attribute_groups] + \
+            [(instantiation, False, False) for instantiation in self.instantiations]
+        for attr_type, setter, is_member in types:
+            # Check if attribute needs to be included (every attribute in a group has the same type)
+            type_expr = parse_type(attr_type)
+            for node in type_expr.walk():
+                include = TYPE_INCLUDE_ASSOCIATION.get(node.name)
+                if include is not None:
                     # Use std:: namespace for these types
-                    if (f"using std::{attr_type};" not in namespaces_used) and (attr_type[:5] != "std::"):
-                        namespaces_used.append(f"using std::{attr_type};")
+                    if node.name[:5] != "std::":
+                        namespaces_used[f"using std::{node.name};"] = None
                     # Include these types if not already included
-                    if type_include_association[attr_type] not in includes:
-                        includes.append(
-                            type_include_association[attr_type])
+                    includes[include] = None
+            for class_name, needs_definition in user_type_uses(type_expr, template_parameters if is_member else ()):
+                if class_name not in generated_classes:
+                    continue
+                member_classes[class_name] = member_classes.get(
+                    class_name, False) or needs_definition
+            # Setters of non-trivial types move their argument into place
+            if setter and self.moves_on_set(attr_type):
+                includes["#include <utility>"] = None
         # Create parent class includes
         for parent in self.parents:
             parent: ParentClass
             # Check if parent class is already included
             parent_include = f"#include \"{parent.name}.hpp\""
-            if parent_include not in parent_includes and parent_include not in includes:
-                parent_includes.append(parent_include)
-        return includes, namespaces_used, parent_includes
+            if parent_include not in includes:
+                parent_includes[parent_include] = None
+        # Parent classes are already included, and the class itself is already declared
+        known_classes = {self.name} | {parent.name for parent in self.parents}
+        forward_declarations = {}
+        source_includes = {}
+        for class_name, needs_definition in member_classes.items():
+            if class_name in known_classes:
+                continue
+            if needs_definition:
+                parent_includes[f"#include \"{class_name}.hpp\""] = None
+            else:
+                forward_declarations[f"class {class_name};"] = None
+                source_includes[f"#include \"{class_name}.hpp\""] = None
+        return (list(includes), list(namespaces_used), list(parent_includes), list(forward_declarations),
+                list(source_includes))
 
     def create_class_declaration(self) -> tuple[str, str]:
         """Generates Declaration for the class, including template specialisation if it exists. Template line in format
@@ -259,19 +388,26 @@ class CPPClassCreator:
         """Generates attribute declarations for the class, in the format `\\t{type} {attr_name};` where `type` is the type of the attribute
         and `attr_name` is the name of the attribute generated by `get_attribute_name`."""
         attributes: list[str] = []
-        for attribute in self.attributes:
-            attribute: Attribute
-            # Create attribute
-            attributes.append(
-                f"\t{attribute.type} {self.get_attribute_name(attribute)};")
+        # Members are declared in the order chosen by the render plan, which may differ from the emmet
+        for group in self.render_plan.member_groups:
+            for attribute in group:
+                attribute: Attribute
+                # Create attribute
+                attributes.append(
+                    f"\t{attribute.type} {self.get_attribute_name(attribute)};")
         return attributes
 
     def get_method_definitions(self) -> dict[str, list[str]]:
+        """Returns method definitions for getter and setter methods from the render plan. See `build_method_definitions`."""
+        return self.render_plan.method_definitions
+
+    @timed_stage("get_method_definitions")
+    def build_method_definitions(self) -> dict[str, list[str]]:
         """Generates method definitions for getter and setter methods, excluding the declaration, including both braces. Returns in the form of a list.
         Index 0: `{`. Index 1: `\\treturn {attr_name};` or `\\t{attr_name} = new{attr_name};`. Index 2: `}`."""
         methods = {}
         # Create definition for getters and setters
-        for attribute in self.attributes:
+        for attribute in self.iter_attributes():
             attribute: Attribute
             # Create getter method definition
             attr_name = self.get_attribute_name(attribute)
@@ -279,32 +415,62 @@ class CPPClassCreator:
                 methods[f"get_{attr_name}"] = [
                     "{", f"\treturn {attr_name};", "}"]
             if attribute.setter:
+                value = f"std::move(new{attr_name})" if self.moves_on_set(
+                    attribute.type) else f"new{attr_name}"
                 methods[f"set_{attr_name}"] = [
-                    "{", f"\t{attr_name} = new{attr_name};", "}"]
+                    "{", f"\t{attr_name} = {value};", "}"]
         return methods
 
+    def moves_on_set(self, attr_type: str) -> bool:
+        """Checks whether the setter of a member of the given type takes its argument by value and moves it into place."""
+        return self.render_options["accessors"] == "efficient" and not is_trivial(attr_type)
+
+    def create_getter_signature(self, attribute: Attribute, scope: str = "") -> str:
+        """Generates the signature of an attribute's getter, e.g. `int get_attr0_g() const`. `scope` is prepended to the method
+        name for out of line definitions, e.g. `ClassName::`. With the `efficient` accessor policy, non-trivial types are
+        returned by const reference, and getters are `noexcept`."""
+        attr_name = self.get_attribute_name(attribute)
+        if self.render_options["accessors"] != "efficient":
+            return f"{attribute.type} {scope}get_{attr_name}() const"
+        # A copy does not keep the member's top-level qualifiers, e.g. `const int` is returned as `int`
+        if is_trivial(attribute.type):
+            return f"{split_cv(attribute.type)[0]} {scope}get_{attr_name}() const noexcept"
+        return f"{const_reference(attribute.type)}{scope}get_{attr_name}() const noexcept"
+
+    def create_setter_signature(self, attribute: Attribute, scope: str = "") -> str:
+        """Generates the signature of an attribute's setter, e.g. `void set_attr0_s(const int &newattr0_s)`. With the `efficient`
+        accessor policy, trivial types are taken by value and the setter is `noexcept`, and non-trivial types are taken by
+        value so the caller can move into them."""
+        attr_name = self.get_attribute_name(attribute)
+        if self.render_options["accessors"] != "efficient":
+            return f"void {scope}set_{attr_name}({const_reference(attribute.type)}new{attr_name})"
+        if is_trivial(attribute.type):
+            return f"void {scope}set_{attr_name}({attribute.type} new{attr_name}) noexcept"
+        return f"void {scope}set_{attr_name}({attribute.type} new{attr_name})"
+
+    @timed_stage("create_method_declarations")
     def create_method_declarations(self) -> list[str]:
         """Generates getter and setter declarations for the class. If class is template
-        class, the methods will be defined and declared here. Declarations are preceded by a `\\t`."""
+        class, or the attribute is inline, the methods will be defined and declared here. Declarations are preceded by a `\\t`."""
         method_declarations = []
-        method_definitions = {}
-        # If class is template class, get definitions as they must be defined along with declarations
-        if self.template:
-            method_definitions = self.get_method_definitions()
-        for attribute in self.attributes:
+        # Template and inline methods must be defined along with their declarations
+        method_definitions = self.get_method_definitions()
+        for attribute in self.iter_attributes():
             attribute: Attribute
             attr_name = self.get_attribute_name(attribute)
             # Create getter and setter declarations
             for method in ["get", "set"]:
                 declaration = ""
                 if method == "get" and attribute.getter:
-                    declaration += f"\t{attribute.type} get_{attr_name}() const"
+                    declaration += "\t" + \
+                        self.create_getter_signature(attribute)
                 elif method == "set" and attribute.setter:
-                    declaration += f"\tvoid set_{attr_name}(const {attribute.type} &new{attr_name})"
-                # If template, add method definition
+                    declaration += "\t" + \
+                        self.create_setter_signature(attribute)
+                # If template or inline, add method definition
                 method_exists = (method == "get" and attribute.getter) or (
                     method == "set" and attribute.setter)
-                if self.template and method_exists:
+                if (self.template or attribute.inline) and method_exists:
                     definition = method_definitions.get(
                         f"{method}_{attr_name}", None)
                     if definition == None:
@@ -320,23 +486,45 @@ class CPPClassCreator:
 
         return method_declarations
 
+    def create_size_guard(self) -> str:
+        """Generates a `static_assert` that the class is no larger than its estimated layout, if the `size_guard` option is set.
+        Returns "" if the layout cannot be fully estimated (base classes, unknown types or template parameters)."""
+        class_layout = self.render_plan.layout
+        if not self.render_options["size_guard"] or class_layout is None or not class_layout.complete:
+            return ""
+        if self.template and not self.specialisation:
+            return ""
+        class_name = self.name + \
+            (f"<{self.specialisation}>" if self.specialisation else "")
+        return f"static_assert(sizeof({class_name}) <= {class_layout.size}, \"{self.name} is larger than its planned layout\");"
+
+    def create_explicit_instantiations(self) -> list[str]:
+        """Generates an explicit instantiation definition for each instantiation type, in format `template class ClassName<int>;`.
+        The header declares them by prepending `extern`."""
+        return [f"template class {self.name}<{instantiation}>;" for instantiation in self.instantiations]
+
     def create_cpp_header(self) -> str:
         return f"#include \"{self.name}.hpp\""
 
+    @timed_stage("define_cpp_methods")
     def define_cpp_methods(self) -> list[str]:
-        """Generates method definitions for associated declarations in the header file."""
+        """Generates method definitions for associated declarations in the header file. Inline methods are already defined there."""
         definitions = []
         method_definitions = self.get_method_definitions()
-        for attribute in self.attributes:
+        for attribute in self.iter_attributes():
             attribute: Attribute
+            if attribute.inline:
+                continue
             attr_name = self.get_attribute_name(attribute)
             # Create getter and setter declarations
             for method in ["get", "set"]:
                 definition = ""
                 if method == "get" and attribute.getter:
-                    definition += f"{attribute.type} {self.name}::get_{attr_name}() const"
+                    definition += self.create_getter_signature(
+                        attribute, f"{self.name}::")
                 elif method == "set" and attribute.setter:
-                    definition += f"void {self.name}::set_{attr_name}(const {attribute.type} &new{attr_name})"
+                    definition += self.create_setter_signature(
+                        attribute, f"{self.name}::")
                 # If template, add method definition
                 method_exists = (method == "get" and attribute.getter) or (
                     method == "set" and attribute.setter)
@@ -353,27 +541,18 @@ class CPPClassCreator:
 
         return definitions
 
+    @timed_stage("create_directory")
     def create_directory_if_not_exists(self, location: str) -> None:
         """Creates a directory if it does not exist."""
         if not os.path.exists(location):
-            os.makedirs(location)
+            # Another process may create the same directory concurrently
+            os.makedirs(location, exist_ok=True)
             print(f"Directory {location} created.")
 
     def do_override(self, location: str, suffix: str) -> bool:
         """Checks if a file with the given name already exists in the specified location.
         If it does, it prompts the user to confirm whether to override it or not."""
-        file_path = f"{location}/{self.name}{suffix}"
-        if os.path.exists(file_path):
-            while True:
-                response = input(
-                    f"File {file_path} already exists. Do you want to override it? (y/n/exit): ").strip().lower()
-                if response in ['y', 'n']:
-                    return response == 'y'
-                elif response == 'exit':
-                    print("Exiting without creating files.")
-                    exit(1)
-                print("Invalid input. Please enter 'y' or 'n'.")
-        return True
+        return confirm_override(f"{location}/{self.name}{suffix}")
 
     def get_write_flag(self, location: str, suffix: str, options: dict[str, bool]) -> str:
         """Determines the write flag for file operations based on user options and existing files."""
@@ -381,83 +560,285 @@ class CPPClassCreator:
             return "a"
         return "w"
 
-    def create_hpp_file(self, location: str, options: dict[str, bool]) -> None:
-        """Generates a header file (.hpp) and its contents for the given class description."""
+    def has_source(self) -> bool:
+        """Checks whether the class gets a source file (.cpp) without rendering it, following the rules of `render_cpp`."""
+        if self.template:
+            return bool(self.instantiations)
+        has_methods = any(attribute.getter or attribute.setter
+                          for attribute in self.iter_attributes() if not attribute.inline)
+        return has_methods or not any(group.inline for group in self.attribute_groups)
+
+    @timed_stage("render_hpp")
+    def render_hpp(self) -> str:
+        """Renders the contents of the header file (.hpp) for the given class description, without writing it."""
+        include_guards = self.create_include_guards()
+        inclusions, namespaces, parent_includes = self.create_inclusions()
+        forward_declarations, _ = self.create_forward_declarations()
+        class_declaration = self.create_class_declaration()
+        attributes = self.create_attributes()
+        method_declarations = self.create_method_declarations()
+        lines = []
+
+        # Write first two parts of include guards
+        if include_guards:
+            lines.append(include_guards[0] + "\n")
+            lines.append(include_guards[1] + "\n\n")
+
+        # A shared precompiled header provides the std includes
+        if inclusions and self.render_options["pch_include"] is not None:
+            inclusions = [f"#include \"{self.render_options['pch_include']}\""]
+
+        # Write inclusions
+        for inclusion in inclusions:
+            lines.append(inclusion + "\n")
+
+        if parent_includes:
+            # Write parent includes
+            for parent_include in parent_includes:
+                lines.append(parent_include + "\n")
+
+        # Write namespaces used
+        for namespace in namespaces:
+            lines.append(f"{namespace}\n")
+
+        lines.append("\n")
+
+        # Write forward declarations of member classes
+        if forward_declarations:
+            for forward_declaration in forward_declarations:
+                lines.append(forward_declaration + "\n")
+            lines.append("\n")
+
+        # Write class
+        if class_declaration[0] != "":
+            lines.append(class_declaration[0] + "\n")
+        lines.append(class_declaration[1] + "\n")
+
+        # Let the struct-of-arrays container read and write the members
+        if self.render_options["soa"]:
+            lines.append(self.create_soa_friend() + "\n\n")
+
+        # Write attributes
+        lines.append("private:\n")
+        for attribute in attributes:
+            lines.append(attribute + "\n")
+
+        # Write methods
+        lines.append("\npublic:\n")
+        for method in method_declarations:
+            lines.append(method + "\n")
+
+        # Close class declaration
+        lines.append("};\n\n")
+
+        # Declare the explicit instantiations, so files including the header do not instantiate them again
+        explicit_instantiations = self.create_explicit_instantiations()
+        if explicit_instantiations:
+            for explicit_instantiation in explicit_instantiations:
+                lines.append(f"extern {explicit_instantiation}\n")
+            lines.append("\n")
+
+        # Guard against the class growing beyond its planned layout
+        size_guard = self.create_size_guard()
+        if size_guard:
+            lines.append(size_guard + "\n\n")
+
+        # Write last part of include guards
+        if include_guards:
+            lines.append(include_guards[2])
+        return "".join(lines)
+
+    @timed_stage("render_cpp")
+    def render_cpp(self) -> str | None:
+        """Renders the contents of the source file (.cpp) for the given class description, without writing it.
+        Returns None for template classes, and for classes whose methods are all defined inline, as they do not need a source file.
+        Template classes with explicit instantiations get a source file that defines them."""
+        if self.template:
+            return self.render_instantiations_cpp()
+        methods = self.define_cpp_methods()
+        if not methods and any(group.inline for group in self.attribute_groups):
+            return None
+        header = self.create_cpp_header()
+        inclusions, namespaces, parent_includes = self.create_inclusions()
+        _, source_includes = self.create_forward_declarations()
+        lines = []
+
+        # Write header inclusion, followed by the classes forward declared in the header
+        lines.append(header + "\n")
+        for source_include in source_includes:
+            lines.append(source_include + "\n")
+        lines.append("\n")
+
+        # Write namespaces used
+        for namespace in namespaces:
+            lines.append(f"{namespace}\n")
+
+        lines.append("\n")
+
+        # Write method definitions
+        for method in methods:
+            lines.append(method + "\n\n")
+        return "".join(lines)
+
+    def render_instantiations_cpp(self) -> str | None:
+        """Renders the source file of a template class that defines its explicit instantiations, or returns None if it has none."""
+        explicit_instantiations = self.create_explicit_instantiations()
+        if not explicit_instantiations:
+            return None
+        _, source_includes = self.create_forward_declarations()
+        lines = [self.create_cpp_header() + "\n"]
+        for source_include in source_includes:
+            lines.append(source_include + "\n")
+        lines.append("\n")
+        for explicit_instantiation in explicit_instantiations:
+            lines.append(explicit_instantiation + "\n")
+        return "".join(lines)
+
+    def create_soa_friend(self) -> str:
+        """Generates the friend declaration of the struct-of-arrays container, preceded by a `\\t`."""
+        if self.template and not self.specialisation:
+            return f"\ttemplate <typename> friend class {self.name}SoA;"
+        return f"\tfriend class {self.name}SoA;"
+
+    @timed_stage("render_soa")
+    def render_soa_hpp(self) -> str | None:
+        """Renders the header of the struct-of-arrays container for the class (`{ClassName}SoA.hpp`), which stores each
+        attribute in its own `vector`, or returns None if the `soa` option is not set. Columns are named after the attributes
+        and kept in emmet order. Members inherited from parent classes are not stored."""
+        if not self.render_options["soa"]:
+            return None
+        attributes = list(self.iter_attributes())
+        for attribute in attributes:
+            if parse_type(attribute.type).declarator.endswith("&"):
+                raise ValueError(
+                    f"{self.name}SoA cannot store the reference member {self.get_attribute_name(attribute)}.")
+        basic_template = self.template and not self.specialisation
+        soa_name = f"{self.name}SoA"
+        if basic_template:
+            class_name = f"{self.name}<T>"
+        elif self.specialisation:
+            class_name = f"{self.name}<{self.specialisation}>"
+        else:
+            class_name = self.name
+        names = [self.get_attribute_name(attribute) for attribute in attributes]
+        lines = [f"#ifndef {soa_name.upper()}_HPP\n", f"#define {soa_name.upper()}_HPP\n\n",
+                 "#include <cstddef>\n", "#include <span>\n", "#include <vector>\n",
+                 f"{self.create_cpp_header()}\n",
+                 "using std::size_t;\n", "using std::span;\n", "using std::vector;\n\n"]
+        if basic_template:
+            lines.append("template <typename T>\n")
+        lines.append(f"class {soa_name}\n{{\n")
+
+        # One column per attribute
+        lines.append("private:\n")
+        for attribute, name in zip(attributes, names):
+            lines.append(f"\tvector<{attribute.type}> {name};\n")
+
+        lines.append("\npublic:\n")
+        # Every column has the same length, so the first is used for the size
+        size = f"{names[0]}.size()" if names else "0"
+        methods = [
+            ("size_t size() const noexcept", [f"return {size};"]),
+            ("void reserve(size_t capacity)", [f"{name}.reserve(capacity);" for name in names]),
+            # Conversion from the class
+            (f"void push_back(const {class_name} &value)", [f"{name}.push_back(value.{name});" for name in names]),
+            # Conversion to the class
+            (f"{class_name} get(size_t index) const",
+             [f"{class_name} value;"] + [f"value.{name} = {name}[index];" for name in names] + ["return value;"]),
+            (f"void set(size_t index, const {class_name} &value)",
+             [f"{name}[index] = value.{name};" for name in names]),
+        ]
+        for attribute, name in zip(attributes, names):
+            # `vector<bool>` packs its elements into bits, so it cannot be viewed as a span
+            type_expr = parse_type(attribute.type)
+            if type_expr.base_name == "bool" and not type_expr.declarator:
+                methods.append((f"vector<{attribute.type}> &{name}_column() noexcept", [f"return {name};"]))
+                methods.append((f"const vector<{attribute.type}> &{name}_column() const noexcept", [f"return {name};"]))
+            else:
+                methods.append((f"span<{attribute.type}> {name}_column() noexcept", [f"return {name};"]))
+                methods.append((f"span<{attribute.type} const> {name}_column() const noexcept", [f"return {name};"]))
+        for signature, body in methods:
+            lines.append(f"\t{signature}\n\t{{\n")
+            for statement in body:
+                lines.append(f"\t\t{statement}\n")
+            lines.append("\t};\n")
+
+        lines.append("};\n\n")
+        lines.append("#endif")
+        return "".join(lines)
+
+    def iter_rendered_files(self) -> Iterator[tuple[str, str]]:
+        """Yields the name and contents of each file generated for the class, rendering each one only when requested."""
+        yield f"{self.name}.hpp", self.render_hpp()
+        cpp = self.render_cpp()
+        if cpp is not None:
+            yield f"{self.name}.cpp", cpp
+        soa = self.render_soa_hpp()
+        if soa is not None:
+            yield f"{self.name}SoA.hpp", soa
+
+    def write_file(self, location: str, suffix: str, contents: str, options: dict[str, bool]) -> bool:
+        """Writes rendered contents to the class's file with the given suffix. If the file already holds exactly these contents
+        it is skipped without asking the user, otherwise it is overridden or appended to (according to `get_write_flag`)
+        with a single atomic write. Returns whether the file was written."""
+        file_path = f"{location}/{self.name}{suffix}"
+        with profiling.timed(self, "file_io"):
+            if not options["append"] and is_unchanged(file_path, contents):
+                return False
+        # The time spent waiting for the user is not file I/O
+        append = self.get_write_flag(location, suffix, options) == "a"
+        with profiling.timed(self, "file_io"):
+            if append:
+                contents = read_existing(file_path) + contents
+            written = write_if_changed(file_path, contents)
+        if written:
+            self.profile.count("bytes_written", len(contents.encode()))
+        return written
+
+    def render(self) -> dict[str, str]:
+        """Renders every file generated for the class, returning a mapping of file name to contents. Does no file I/O and never prompts."""
+        return dict(self.iter_rendered_files())
+
+    def create_hpp_file(self, location: str, options: dict[str, bool], contents: str | None = None) -> bool:
+        """Generates a header file (.hpp) and its contents for the given class description, unless they were already rendered
+        (e.g. by `render`). Returns whether the file was written, as it is skipped if its contents are unchanged."""
         self.create_directory_if_not_exists(location)
-        write_flag = self.get_write_flag(location, ".hpp", options)
-        with open(f"{location}/{self.name}.hpp", write_flag) as file:
-            include_guards = self.create_include_guards()
-            inclusions, namespaces, parent_includes = self.create_inclusions()
-            class_declaration = self.create_class_declaration()
-            attributes = self.create_attributes()
-            method_declarations = self.create_method_declarations()
-
-            # Write first two parts of include guards
-            if (self.template):
-                file.write(include_guards[0] + "\n")
-                file.write(include_guards[1] + "\n\n")
-
-            # Write inclusions
-            for inclusion in inclusions:
-                file.write(inclusion + "\n")
-
-            if parent_includes:
-                # Write parent includes
-                for parent_include in parent_includes:
-                    file.write(parent_include + "\n")
-
-            # Write namespaces used
-            for namespace in namespaces:
-                file.write(f"{namespace}\n")
-
-            file.write("\n")
-
-            # Write class
-            if class_declaration[0] != "":
-                file.write(class_declaration[0] + "\n")
-            file.write(class_declaration[1] + "\n")
-
-            # Write attributes
-            file.write("private:\n")
-            for attribute in attributes:
-                file.write(attribute + "\n")
-
-            # Write methods
-            file.write("\npublic:\n")
-            for method in method_declarations:
-                file.write(method + "\n")
-
-            # Close class declaration
-            file.write("};\n\n")
-
-            # Write last part of include guards
-            if (self.template):
-                file.write(include_guards[2])
+        if self.render_plan.layout is not None:
+            print(self.render_plan.layout.describe(self.name))
+        if self.render_plan.forward_declarations:
+            print(self.describe_forward_declarations())
+        if not self.write_file(location, ".hpp", self.render_hpp() if contents is None else contents, options):
+            print(f"Header file unchanged at ./{self.name}.hpp, skipped")
+            return False
         print(f"Header file generated successfully at ./{self.name}.hpp")
+        return True
 
-    def create_cpp_file(self, location: str, options: dict[str, bool]) -> None:
-        """Creates a cpp file (.cpp) for the given class description."""
-        self.create_directory_if_not_exists(location)
-        write_flag = write_flag = self.get_write_flag(
-            location, ".cpp", options)
-        if self.template:
+    def create_cpp_file(self, location: str, options: dict[str, bool], contents: str | None = None) -> bool | None:
+        """Creates a cpp file (.cpp) for the given class description, unless its contents were already rendered. Returns whether
+        the file was written, as it is skipped if its contents are unchanged, or None if the class does not need a cpp file."""
+        if contents is None:
+            contents = self.render_cpp()
+        if contents is None:
             # Exit as no cpp file needed
-            return
-        with open(f"{location}/{self.name}.cpp", write_flag) as file:
-            header = self.create_cpp_header()
-            inclusions, namespaces, parent_includes = self.create_inclusions()
-            methods = self.define_cpp_methods()
-
-            # Write header inclusion
-            file.write(header + "\n\n")
-
-            # Write namespaces used
-            for namespace in namespaces:
-                file.write(f"{namespace}\n")
-
-            file.write("\n")
-
-            # Write method definitions
-            for method in methods:
-                file.write(method + "\n\n")
+            return None
+        self.create_directory_if_not_exists(location)
+        if not self.write_file(location, ".cpp", contents, options):
+            print(f"Source file unchanged at ./{self.name}.cpp, skipped")
+            return False
         print(f"Source file generated successfully at ./{self.name}.cpp")
+        return True
+
+    def create_soa_file(self, location: str, options: dict[str, bool], contents: str | None = None) -> bool | None:
+        """Creates the header of the struct-of-arrays container (`{ClassName}SoA.hpp`) if the `soa` option is set, unless its
+        contents were already rendered. Returns whether the file was written, as it is skipped if its contents are unchanged,
+        or None if no container is generated."""
+        if contents is None:
+            contents = self.render_soa_hpp()
+        if contents is None:
+            return None
+        self.create_directory_if_not_exists(location)
+        if not self.write_file(location, "SoA.hpp", contents, options):
+            print(f"Container header unchanged at ./{self.name}SoA.hpp, skipped")
+            return False
+        print(f"Container header generated successfully at ./{self.name}SoA.hpp")
+        return True
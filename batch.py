@@ -0,0 +1,219 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import os
+import re
+import time
+from cache import GenerationCache, cache_key
+from CPPClassCreator import CPPClassCreator, confirm_override, render_options_from
+from emmet import IDENTIFIER, parse_class_name, parse_emmet
+from manifest import ManifestEntry
+from output import WriteStats, content_hash, is_unchanged
+import profiling
+
+DIGITS = re.compile(r"[0-9]+")
+
+
+@dataclass(repr=True)
+class BatchResult:
+    """Class to represent the outcome of generating a single class in a batch."""
+    name: str
+    location: str
+    attributes: int
+    seconds: float
+    written: int
+    skipped: int
+    # Hashes of the generated files by file name, for the incremental generation cache
+    files: dict[str, str] = field(default_factory=dict)
+    # The std includes of the class, for the batch's shared precompiled header
+    includes: list[str] = field(default_factory=list)
+    # The parents of the class (name, whether it is inherited virtually) and its includes of other generated classes by
+    # the header and the source file, for the class graph
+    parents: list[tuple[str, bool]] = field(default_factory=list)
+    parent_includes: list[str] = field(default_factory=list)
+    source_includes: list[str] = field(default_factory=list)
+    # Whether the class was skipped, in which case the result is rebuilt from its cache entry
+    cached: bool = False
+    # Per-stage timings and counters, if profiling was enabled
+    profile: dict | None = None
+
+
+@dataclass(repr=True)
+class BatchTask:
+    """Class to represent a manifest entry whose overwrite decisions have already been made, so it can be generated
+    without user interaction (e.g. in a worker process)."""
+    entry: ManifestEntry
+    hpp_options: dict[str, bool]
+    cpp_options: dict[str, bool]
+    # For the struct-of-arrays container header, if the `soa` option is set
+    soa_options: dict[str, bool]
+    # The files of the class by file name, if they were already rendered to decide which ones to ask about
+    rendered: dict[str, str] | None = None
+
+
+def merge_options(defaults: dict[str, bool], entry: ManifestEntry) -> dict[str, bool]:
+    """Combines the command line options with the per-class options from the manifest. Per-class options take precedence.
+    The `classes` option is narrowed to the names the emmet mentions, so adding a class to the batch does not change the
+    cache key of every other class."""
+    options = dict(defaults)
+    options.update(entry.options)
+    if options["append"] and options["override"]:
+        raise ValueError(
+            f"Cannot use append and override at the same time for {entry.emmet}.")
+    if options.get("classes") is not None:
+        options["classes"] = sorted(mentioned_names(entry.emmet).intersection(options["classes"]))
+    return options
+
+
+def mentioned_names(emmet: str) -> set[str]:
+    """Returns the names an emmet may mention. Attribute types follow their flags and count without a separator, e.g.
+    `gs1Foo`, so the rest of each word after a run of digits is also a candidate."""
+    names = set()
+    for word in IDENTIFIER.findall(emmet):
+        names.add(word)
+        names.update(word[digits.end():] for digits in DIGITS.finditer(word))
+    return names
+
+
+def with_batch_classes(entries: list[ManifestEntry], options: dict) -> dict:
+    """Returns the options with the name of every class in the batch and every external class added to the `classes`
+    option, so classes used as member types of each other are included or forward declared."""
+    classes = list(options.get("classes") or []) + list(options.get("external") or [])
+    classes += [parse_class_name(entry.emmet) for entry in entries]
+    return {**options, "classes": list(dict.fromkeys(classes))}
+
+
+def resolve_write_options(file_path: str, contents: str | None, options: dict[str, bool]) -> dict[str, bool]:
+    """Decides up front whether an existing file will be overridden or appended to, asking the user if neither flag is set.
+    Files that are not generated (`contents` is None) or already hold exactly the rendered contents are skipped without
+    asking, so the options are returned as they are. Otherwise the returned options have exactly one of `override` and
+    `append` set, so `do_override` is never called when they are used."""
+    if options["append"] or options["override"] or contents is None or is_unchanged(file_path, contents):
+        return options
+    override = confirm_override(file_path)
+    return {**options, "override": override, "append": not override}
+
+
+def resolve_task(entry: ManifestEntry, options: dict[str, bool]) -> BatchTask:
+    """Creates a BatchTask for a manifest entry, resolving any overwrite conflicts for each of its files. The emmet is
+    parsed first, so a malformed emmet stops the batch before any class is written. If any of the class's files already
+    exist, the class is rendered here, so the user is only asked about files that will be written with different contents."""
+    parse_emmet(entry.emmet)
+    options = merge_options(options, entry)
+    if options["append"] or options["override"]:
+        return BatchTask(entry, options, options, options)
+    name = parse_class_name(entry.emmet)
+    file_paths = [f"{entry.location}/{name}{suffix}" for suffix in (".hpp", ".cpp", "SoA.hpp")]
+    if not any(os.path.exists(file_path) for file_path in file_paths):
+        return BatchTask(entry, options, options, options)
+    rendered = CPPClassCreator(entry.emmet, options).render()
+    return BatchTask(entry, *(resolve_write_options(file_path, rendered.get(os.path.basename(file_path)), options)
+                              for file_path in file_paths), rendered)
+
+
+def generate_task(task: BatchTask) -> BatchResult:
+    """Parses a single class and writes its `.hpp`, `.cpp` and struct-of-arrays container files, timing the whole process."""
+    # Worker processes do not share the parent's profiling state, so it is enabled per task
+    if task.hpp_options.get("profile"):
+        profiling.enable()
+    start = time.perf_counter()
+    creator = CPPClassCreator(task.entry.emmet, task.hpp_options)
+    # Each file is rendered once, and hashed from the same contents for the cache
+    rendered = creator.render() if task.rendered is None else task.rendered
+    stats = WriteStats()
+    stats.add(creator.create_hpp_file(task.entry.location, task.hpp_options, rendered[f"{creator.name}.hpp"]))
+    if f"{creator.name}.cpp" in rendered:
+        stats.add(creator.create_cpp_file(task.entry.location, task.cpp_options, rendered[f"{creator.name}.cpp"]))
+    if f"{creator.name}SoA.hpp" in rendered:
+        stats.add(creator.create_soa_file(task.entry.location, task.soa_options, rendered[f"{creator.name}SoA.hpp"]))
+    files = {file_name: content_hash(contents) for file_name, contents in rendered.items()}
+    plan = creator.render_plan
+    return BatchResult(creator.name, task.entry.location, creator.attribute_count, time.perf_counter() - start,
+                       stats.written, stats.skipped, files, plan.includes,
+                       [(parent.name, parent.virtual) for parent in creator.parents], plan.parent_includes,
+                       plan.source_includes, profile=creator.profile.to_dict() if profiling.ENABLED else None)
+
+
+def cached_result(entry: ManifestEntry, cache_entry: dict) -> BatchResult:
+    """Rebuilds the result of a class skipped by the cache from its cache entry, without parsing it."""
+    return BatchResult(cache_entry["class"], entry.location, 0, 0.0, 0, 0, cache_entry["files"], cache_entry["includes"],
+                       [(name, virtual) for name, virtual in cache_entry["parents"]], cache_entry["parent_includes"],
+                       cache_entry["source_includes"], cached=True)
+
+
+def entry_cache_key(entry: ManifestEntry, options: dict[str, bool]) -> str:
+    """Returns the key of a manifest entry in the incremental generation cache of its location."""
+    return cache_key(entry.emmet, render_options_from(merge_options(options, entry)))
+
+
+def report_throughput(results: list[BatchResult], total_seconds: float) -> None:
+    """Prints the time taken for each class, followed by the total time and throughput of the batch and how many files
+    were written or skipped because they were unchanged."""
+    for result in results:
+        print(
+            f"{result.name}: {result.attributes} attributes in {result.seconds * 1000:.2f} ms")
+    rate = len(results) / total_seconds if total_seconds > 0 else float("inf")
+    print(
+        f"Generated {len(results)} classes in {total_seconds:.3f} s ({rate:.1f} classes/s)")
+    written = sum(result.written for result in results)
+    skipped = sum(result.skipped for result in results)
+    print(f"Wrote {written} files, skipped {skipped} unchanged files")
+
+
+def is_cacheable(entry: ManifestEntry, options: dict[str, bool]) -> bool:
+    """Checks whether a class can use the incremental generation cache. Appending is never repeatable, so it always runs."""
+    return not merge_options(options, entry)["append"]
+
+
+def run_batch(entries: list[ManifestEntry], options: dict[str, bool], jobs: int = 1) -> list[BatchResult]:
+    """Generates every class in the manifest and reports per-class and total throughput. With more than one job the
+    classes are spread across a process pool; results are collected in manifest order, so the output is identical to a serial run.
+    Classes whose emmet, options and generator version are unchanged since the last run, and whose files are untouched,
+    are skipped using the cache in their output directory, unless the `force` option is set. With the `gc` option,
+    cache entries for classes no longer in the manifest are removed.
+    Returns the result of every class in manifest order, where skipped classes have `cached` set."""
+    start = time.perf_counter()
+    caches: dict[str, GenerationCache] = {}
+    keys: dict[str, set[str]] = {}
+    pending = []
+    # The cache entry of each skipped class, by position in the manifest
+    cached: dict[int, dict] = {}
+    for position, entry in enumerate(entries):
+        cache = caches.setdefault(
+            entry.location, GenerationCache(entry.location))
+        key = entry_cache_key(entry, options)
+        keys.setdefault(entry.location, set()).add(key)
+        if not is_cacheable(entry, options):
+            pending.append((entry, None))
+        elif not options.get("force") and cache.is_fresh(key):
+            cached[position] = cache.entries[key]
+        else:
+            pending.append((entry, key))
+    # Overwrite prompts need the terminal, so they are all answered before any class is generated
+    tasks = [resolve_task(entry, options) for entry, _ in pending]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(tasks) // (jobs * 4))
+            results = list(executor.map(
+                generate_task, tasks, chunksize=chunksize))
+    else:
+        results = [generate_task(task) for task in tasks]
+    # Record the generated files of every class that was overridden rather than appended to
+    for (entry, key), task, result in zip(pending, tasks, results):
+        if key is not None and not any(task_options["append"] for task_options in
+                                       (task.hpp_options, task.cpp_options, task.soa_options)):
+            caches[entry.location].record(key, result.name, result.files, includes=result.includes, parents=result.parents,
+                                          parent_includes=result.parent_includes, source_includes=result.source_includes)
+    if options.get("gc"):
+        removed = sum(cache.prune(keys[location])
+                      for location, cache in caches.items())
+        print(f"Removed {removed} stale cache entries")
+    for cache in caches.values():
+        cache.save()
+    for result in results:
+        if result.profile is not None:
+            profiling.emit(result.profile)
+    report_throughput(results, time.perf_counter() - start)
+    print(f"Skipped {len(cached)} classes unchanged since the last run")
+    generated = iter(results)
+    return [cached_result(entry, cached[position]) if position in cached else next(generated)
+            for position, entry in enumerate(entries)]
@@ -0,0 +1,52 @@
+"""Measures the memory used by the parsed model, the render time and the peak RSS for classes with many attributes.
+
+Run from the repository root: `python3 benchmarks/bench_attributes.py`. Each workload runs in a fresh process so the
+peak RSS figures are independent."""
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKLOADS = [
+    "Big;g100000int",
+    "Big;g100000int;gs50000string",
+    "Big;gs" + "1int1float" * 5000,
+]
+
+
+def measure(emmet: str) -> None:
+    """Prints the measurements for a single emmet in the current process."""
+    sys.path.insert(0, ROOT)
+    from CPPClassCreator import CPPClassCreator
+    # Model memory is traced separately, as tracing slows down rendering
+    tracemalloc.start()
+    model = CPPClassCreator(emmet)
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del model
+    start = time.perf_counter()
+    creator = CPPClassCreator(emmet)
+    parsed = time.perf_counter()
+    creator.render_hpp()
+    creator.render_cpp()
+    rendered = time.perf_counter()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    label = emmet if len(emmet) < 40 else emmet[:37] + "..."
+    print(f"{label:<40}{model_bytes / 1e6:>12.2f}{(parsed - start) * 1000:>12.1f}"
+          f"{(rendered - parsed) * 1000:>12.1f}{peak_rss:>12.1f}")
+
+
+def main() -> None:
+    print(f"{'workload':<40}{'model (MB)':>12}{'parse (ms)':>12}{'render (ms)':>12}{'RSS (MB)':>12}")
+    for emmet in WORKLOADS:
+        subprocess.run([sys.executable, __file__, emmet], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,45 @@
+"""Benchmarks parsing emmets with thousands of parents, attribute groups and attribute sets.
+
+Run from the repository root: `python3 benchmarks/bench_parser.py`."""
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from CPPClassCreator import CPPClassCreator  # noqa: E402
+from emmet import parse_emmet  # noqa: E402
+
+SIZES = [1000, 5000, 20000]
+
+
+def many_parents(size: int) -> str:
+    return "Big" + "".join(f"+Parent{i}?" for i in range(size))
+
+
+def many_groups(size: int) -> str:
+    return "Big;gs" + "".join(f"1type{chr(97 + i % 26)}" for i in range(size))
+
+
+def many_sets(size: int) -> str:
+    return "Big" + ";gs1int2float" * size
+
+
+WORKLOADS = {"parents": many_parents, "groups": many_groups, "sets": many_sets}
+
+
+def best_time(statement, repeat: int = 5) -> float:
+    """Returns the fastest of several runs of the statement, in milliseconds."""
+    return min(timeit.repeat(statement, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    print(f"{'workload':<10}{'size':>8}{'parse (ms)':>14}{'__init__ (ms)':>16}")
+    for name, workload in WORKLOADS.items():
+        for size in SIZES:
+            emmet = workload(size)
+            parse_ms = best_time(lambda: parse_emmet(emmet))
+            init_ms = best_time(lambda: CPPClassCreator(emmet))
+            print(f"{name:<10}{size:>8}{parse_ms:>14.2f}{init_ms:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Benchmark suite for the parse, render and write stages of the generator, with a regression gate.
+
+Run from the repository root:
+
+    python3 benchmarks/suite.py run [-output results.json] [-repeat N] [-quick]
+    python3 benchmarks/suite.py compare baseline.json results.json [-threshold 0.10]
+
+`run` times each stage on each workload (the best of N repeats) and writes the results as JSON. `compare` prints the
+change of every stage between two results files and exits with an error if any stage is slower than the baseline by more
+than the threshold (a fraction, so 0.10 is 10%)."""
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from CPPClassCreator import CPPClassCreator, GENERATOR_VERSION  # noqa: E402
+
+# Differences smaller than this (in seconds) are treated as noise by `compare`
+NOISE_FLOOR = 0.00005
+WRITE_OPTIONS = {"override": True, "append": False}
+
+
+def many_attributes(size: int) -> list[str]:
+    return ["Big;gs" + "".join(f"{i % 9 + 1}int{i % 3 + 1}string" for i in range(size // 10))]
+
+
+def many_parents(size: int) -> list[str]:
+    return ["Big" + "".join(f"+Parent{i}?" for i in range(size)) + ";gs2int"]
+
+
+def template_class(size: int) -> list[str]:
+    return [f"Big<>;gs{size}T;s{size}vector<T>"]
+
+
+def non_template_class(size: int) -> list[str]:
+    return [f"Big;gs{size}int;s{size}vector<string>"]
+
+
+def batch(size: int) -> list[str]:
+    return [f"Class{i}+Base{i % 10};gs3int2string;s1double;4float" for i in range(size)]
+
+
+# Workload name: (emmets generator, full size, quick size)
+WORKLOADS = {
+    "many_attributes": (many_attributes, 20000, 2000),
+    "many_parents": (many_parents, 2000, 200),
+    "template": (template_class, 5000, 500),
+    "non_template": (non_template_class, 5000, 500),
+    "batch": (batch, 2000, 200),
+}
+
+
+def time_stages(emmets: list[str], directory: str) -> dict[str, float]:
+    """Times every stage once for each emmet, returning the total time for each stage in seconds. Inclusions and method
+    definitions are timed with an empty render plan, so they measure the work of computing it."""
+    stages = dict.fromkeys(["parse", "create_inclusions", "get_method_definitions", "create_method_declarations",
+                            "define_cpp_methods", "create_hpp_file", "create_cpp_file"], 0.0)
+    for emmet in emmets:
+        start = time.perf_counter()
+        creator = CPPClassCreator(emmet)
+        stages["parse"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        creator.resolve_inclusions()
+        stages["create_inclusions"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        creator.build_method_definitions()
+        stages["get_method_definitions"] += time.perf_counter() - start
+
+        # The remaining stages share the render plan, as they do when generating files
+        creator.render_plan
+        start = time.perf_counter()
+        creator.create_method_declarations()
+        stages["create_method_declarations"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        creator.define_cpp_methods()
+        stages["define_cpp_methods"] += time.perf_counter() - start
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            creator.create_hpp_file(directory, WRITE_OPTIONS)
+            stages["create_hpp_file"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            creator.create_cpp_file(directory, WRITE_OPTIONS)
+            stages["create_cpp_file"] += time.perf_counter() - start
+    return stages
+
+
+def run(repeat: int, quick: bool) -> dict:
+    """Runs every workload `repeat` times and returns the best time of each stage."""
+    results = {}
+    for name, (workload, full_size, quick_size) in WORKLOADS.items():
+        emmets = workload(quick_size if quick else full_size)
+        best = None
+        for _ in range(repeat):
+            # A fresh directory each time, so the writers always write rather than skip unchanged files
+            with tempfile.TemporaryDirectory() as directory:
+                stages = time_stages(emmets, directory)
+            best = stages if best is None else {
+                stage: min(best[stage], seconds) for stage, seconds in stages.items()}
+        results[name] = best
+        print(f"{name}: " + ", ".join(f"{stage} {seconds * 1000:.2f} ms" for stage, seconds in best.items()),
+              file=sys.stderr)
+    return {
+        "generator_version": GENERATOR_VERSION,
+        "python": platform.python_version(),
+        "quick": quick,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Prints the change of every stage between two results, returning a description of each regression beyond the threshold."""
+    regressions = []
+    if baseline.get("quick") != current.get("quick"):
+        print("Warning: comparing quick and full benchmark runs.")
+    for workload, stages in current["results"].items():
+        for stage, seconds in stages.items():
+            base_seconds = baseline["results"].get(workload, {}).get(stage)
+            if base_seconds is None:
+                continue
+            change = (seconds - base_seconds) / base_seconds if base_seconds > 0 else 0.0
+            print(f"{workload:<18}{stage:<28}{base_seconds * 1000:>10.2f} ms{seconds * 1000:>10.2f} ms{change:>+9.1%}")
+            if change > threshold and seconds - base_seconds > NOISE_FLOOR:
+                regressions.append(f"{workload}/{stage} is {change:.1%} slower")
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if not args or args[0] not in ("run", "compare"):
+        print(__doc__)
+        exit(1)
+    command, args = args[0], args[1:]
+    options = {"-output": None, "-repeat": "5", "-threshold": "0.10"}
+    flags = set()
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in options:
+            if i + 1 >= len(args):
+                print(f"No value provided for {args[i]}.")
+                exit(1)
+            options[args[i]] = args[i + 1]
+            i += 1
+        elif args[i] == "-quick":
+            flags.add(args[i])
+        else:
+            positional.append(args[i])
+        i += 1
+
+    if command == "run":
+        results = json.dumps(run(int(options["-repeat"]), "-quick" in flags), indent=2)
+        if options["-output"] is None:
+            print(results)
+        else:
+            with open(options["-output"], "w") as file:
+                file.write(results + "\n")
+        return
+
+    if len(positional) != 2:
+        print("compare requires a baseline and a results file.")
+        exit(1)
+    regressions = compare(load_results(positional[0]), load_results(positional[1]), float(options["-threshold"]))
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"\t{regression}")
+        exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
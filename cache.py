@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+from CPPClassCreator import GENERATOR_VERSION
+from output import file_hash, write_if_changed
+
+CACHE_FILE_NAME = ".cppclassgen-cache.json"
+CACHE_FORMAT = 3
+
+
+def cache_key(emmet: str, render_options: dict) -> str:
+    """Returns the hash identifying a generated class: its emmet, the options that affect its output, and the generator version."""
+    description = json.dumps(
+        [emmet, render_options, GENERATOR_VERSION], sort_keys=True)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+class GenerationCache:
+    """Class to represent the incremental generation cache of an output directory. Maps cache keys to the name of the class,
+    the hashes of the files generated for it, and its includes and parents, stored as JSON in `{location}/.cppclassgen-cache.json`."""
+
+    def __init__(self, location: str) -> None:
+        self.location = location
+        self.path = os.path.join(location, CACHE_FILE_NAME)
+        self.entries: dict[str, dict] = {}
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            if data.get("format") == CACHE_FORMAT:
+                self.entries = data["entries"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            # A missing or unreadable cache just means everything is regenerated
+            self.entries = {}
+
+    def is_fresh(self, key: str) -> bool:
+        """Checks whether the class with this key was generated before and its files are still exactly as generated."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        return all(file_hash(os.path.join(self.location, file_name)) == expected
+                   for file_name, expected in entry["files"].items())
+
+    def record(self, key: str, name: str, files: dict[str, str], **details: list) -> None:
+        """Records the file hashes generated for the class with this key, along with the details of the class (such as its
+        includes and parents) that are needed for the batch without parsing it again."""
+        self.entries[key] = {"class": name, "files": files, **details}
+
+    def prune(self, keep: set[str]) -> int:
+        """Removes every entry whose key is not in `keep`, returning how many were removed."""
+        removed = [key for key in self.entries if key not in keep]
+        for key in removed:
+            del self.entries[key]
+        return len(removed)
+
+    def save(self) -> None:
+        """Writes the cache back to the output directory (only if it has changed)."""
+        os.makedirs(self.location, exist_ok=True)
+        write_if_changed(self.path, json.dumps(
+            {"format": CACHE_FORMAT, "entries": self.entries}, indent=1, sort_keys=True) + "\n")
@@ -0,0 +1,218 @@
+from dataclasses import dataclass, field
+import heapq
+import os
+from batch import entry_cache_key, is_cacheable, merge_options
+from cache import GenerationCache
+from CPPClassCreator import CPPClassCreator
+from manifest import ManifestEntry
+from output import write_if_changed
+
+
+@dataclass(repr=True)
+class ClassVertex:
+    """Class to represent a class in a batch's class graph: its manifest entry, its parents, and the other classes
+    included by its header (parents and members that must be complete) and by its source file (forward declared members)."""
+    name: str
+    entry: ManifestEntry
+    # (parent name, whether it is inherited virtually), in declaration order
+    parents: list[tuple[str, bool]] = field(default_factory=list)
+    header_classes: list[str] = field(default_factory=list)
+    source_classes: list[str] = field(default_factory=list)
+    # Whether a `.cpp` is generated for the class
+    has_source: bool = True
+
+
+def graph_name(name: str) -> str:
+    """Returns the name of a class without template arguments, e.g. `Base` for `Base<int>`."""
+    return name.split("<")[0].strip()
+
+
+def included_class(include: str) -> str:
+    """Returns the name of the class included by an include of a generated header, e.g. `Base` for `#include "Base.hpp"`."""
+    return graph_name(include[len("#include \""):-len(".hpp\"")])
+
+
+def vertex_from_entry(entry: ManifestEntry, options: dict) -> ClassVertex:
+    """Creates the vertex of a manifest entry from the render plan of its class, so the graph follows exactly the includes
+    of the generated files."""
+    creator = CPPClassCreator(entry.emmet, merge_options(options, entry))
+    plan = creator.render_plan
+    vertex = ClassVertex(creator.name, entry)
+    vertex.parents = [(graph_name(parent.name), parent.virtual) for parent in creator.parents]
+    vertex.header_classes = [included_class(include) for include in plan.parent_includes]
+    vertex.source_classes = [included_class(include) for include in plan.source_includes]
+    vertex.has_source = creator.has_source()
+    return vertex
+
+
+def vertex_from_cache(entry: ManifestEntry, cache_entry: dict) -> ClassVertex:
+    """Creates the vertex of a manifest entry skipped by the cache from its cache entry, without parsing it."""
+    vertex = ClassVertex(cache_entry["class"], entry)
+    vertex.parents = [(graph_name(name), virtual) for name, virtual in cache_entry["parents"]]
+    vertex.header_classes = [included_class(include) for include in cache_entry["parent_includes"]]
+    vertex.source_classes = [included_class(include) for include in cache_entry["source_includes"]]
+    vertex.has_source = f"{vertex.name}.cpp" in cache_entry["files"]
+    return vertex
+
+
+class ClassGraph:
+    """Class to represent the inheritance and include relationships between all the classes of a batch. Classes that
+    are not generated by the batch must be listed in the `external` (or `classes`) option, otherwise they are reported as missing.
+    Classes that the batch will skip as unchanged are read from the cache rather than parsed."""
+
+    def __init__(self, entries: list[ManifestEntry], options: dict) -> None:
+        self.external = set(options.get("external") or []) | set(options.get("classes") or [])
+        self.vertices: dict[str, ClassVertex] = {}
+        self.errors: list[str] = []
+        caches: dict[str, GenerationCache] = {}
+        for entry in entries:
+            vertex = None
+            if not options.get("force") and is_cacheable(entry, options):
+                cache = caches.setdefault(entry.location, GenerationCache(entry.location))
+                key = entry_cache_key(entry, options)
+                if cache.is_fresh(key):
+                    vertex = vertex_from_cache(entry, cache.entries[key])
+            if vertex is None:
+                vertex = vertex_from_entry(entry, options)
+            if vertex.name in self.vertices:
+                self.errors.append(f"{vertex.name} is generated more than once.")
+                continue
+            self.vertices[vertex.name] = vertex
+        self.errors.extend(self.find_missing())
+        cycle = self.find_cycle()
+        if cycle:
+            self.errors.append("Include cycle: " + " -> ".join(cycle))
+
+    def dependencies(self, name: str) -> list[str]:
+        """Returns the classes in the batch whose headers must exist before the class's header compiles."""
+        return [dependency for dependency in self.vertices[name].header_classes if dependency in self.vertices]
+
+    def find_missing(self) -> list[str]:
+        """Returns an error for every parent or member class that is neither in the batch nor external."""
+        missing = []
+        for vertex in self.vertices.values():
+            parents = {name for name, _ in vertex.parents}
+            for dependency in vertex.header_classes + vertex.source_classes:
+                # Namespaced classes cannot be generated, so they are always external
+                if dependency in self.vertices or dependency in self.external or "::" in dependency:
+                    continue
+                kind = "parent class" if dependency in parents else "member class"
+                missing.append(f"{vertex.name}: {kind} {dependency} is not in the batch or marked external.")
+        return missing
+
+    def find_cycle(self) -> list[str] | None:
+        """Returns a cycle of header includes, e.g. [A, B, A], or None if there is none. Forward declared members do not
+        form cycles, as they are only included by the `.cpp`."""
+        # 0: not visited, 1: on the current path, 2: finished
+        state = dict.fromkeys(self.vertices, 0)
+        path = []
+
+        def visit(name: str) -> list[str] | None:
+            state[name] = 1
+            path.append(name)
+            for dependency in self.dependencies(name):
+                if state[dependency] == 1:
+                    return path[path.index(dependency):] + [dependency]
+                if state[dependency] == 0:
+                    cycle = visit(dependency)
+                    if cycle:
+                        return cycle
+            path.pop()
+            state[name] = 2
+            return None
+
+        for name in self.vertices:
+            if state[name] == 0:
+                cycle = visit(name)
+                if cycle:
+                    return cycle
+        return None
+
+    def topological_order(self) -> list[ManifestEntry]:
+        """Returns the manifest entries ordered so that every class comes after the classes its header includes. Classes
+        that are not ordered by a dependency keep their manifest order. The graph must not have a cycle."""
+        position = {name: i for i, name in enumerate(self.vertices)}
+        remaining = {name: len(self.dependencies(name)) for name in self.vertices}
+        dependents: dict[str, list[str]] = {name: [] for name in self.vertices}
+        for name in self.vertices:
+            for dependency in self.dependencies(name):
+                dependents[dependency].append(name)
+        ready = [(position[name], name) for name, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, name = heapq.heappop(ready)
+            order.append(self.vertices[name].entry)
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, (position[dependent], dependent))
+        return order
+
+    def find_diamonds(self) -> list[str]:
+        """Returns a warning for every class that contains more than one subobject of the same base class, because the
+        base is reached through several paths and is not inherited virtually (`?`) on each of them."""
+        # Class name -> {base name: [number of non-virtual paths, whether any path is virtual]}
+        bases: dict[str, dict[str, list]] = {}
+
+        def collect(name: str) -> dict[str, list]:
+            if name in bases:
+                return bases[name]
+            counts: dict[str, list] = {}
+            bases[name] = counts
+            vertex = self.vertices.get(name)
+            for parent, virtual in vertex.parents if vertex is not None else []:
+                count = counts.setdefault(parent, [0, False])
+                if virtual:
+                    count[1] = True
+                else:
+                    count[0] += 1
+                for base, (non_virtual, any_virtual) in collect(parent).items():
+                    count = counts.setdefault(base, [0, False])
+                    count[0] += non_virtual
+                    count[1] = count[1] or any_virtual
+            return counts
+
+        warnings = []
+        for name in self.vertices:
+            for base, (non_virtual, any_virtual) in collect(name).items():
+                copies = non_virtual + (1 if any_virtual else 0)
+                if copies > 1:
+                    warnings.append(f"Warning: {name} contains {copies} copies of {base}, as it is inherited through "
+                                    f"more than one path without virtual inheritance (`?`).")
+        return warnings
+
+    def header_path(self, name: str) -> str:
+        return os.path.join(self.vertices[name].entry.location, f"{name}.hpp")
+
+    def header_dependencies(self, name: str, seen: dict[str, None] | None = None) -> dict[str, None]:
+        """Returns the headers of the batch that a class's header includes, directly or indirectly, in include order."""
+        seen = {} if seen is None else seen
+        for dependency in self.dependencies(name):
+            header = self.header_path(dependency)
+            if header not in seen:
+                seen[header] = None
+                self.header_dependencies(dependency, seen)
+        return seen
+
+    def depfile(self) -> str:
+        """Returns Makefile (and Ninja) depfile rules listing the headers each generated `.cpp` depends on. Object files
+        are named after the `.cpp`, e.g. `out/Foo.o: out/Foo.cpp out/Foo.hpp out/Base.hpp`."""
+        rules = []
+        for name, vertex in self.vertices.items():
+            if not vertex.has_source:
+                continue
+            prerequisites = {os.path.join(vertex.entry.location, f"{name}.cpp"): None, self.header_path(name): None}
+            self.header_dependencies(name, prerequisites)
+            for source_class in vertex.source_classes:
+                if source_class in self.vertices:
+                    prerequisites[self.header_path(source_class)] = None
+                    self.header_dependencies(source_class, prerequisites)
+            target = os.path.join(vertex.entry.location, f"{name}.o")
+            rules.append(f"{target}: " + " ".join(prerequisites))
+        return "".join(rule + "\n" for rule in rules)
+
+    def write_depfile(self, path: str) -> bool:
+        """Writes the depfile, creating its directory if needed. Returns whether it was written, as it is skipped if unchanged."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return write_if_changed(path, self.depfile())
@@ -0,0 +1,88 @@
+import json
+import os
+import socket
+import sys
+
+# Only the standard library modules above are imported up front, so starting the client is as cheap as possible
+
+
+def default_socket_path() -> str:
+    """Returns the socket the generator daemon listens on: `$CPPCLASSGEN_SOCKET`, or a per-user socket in the runtime directory."""
+    if "CPPCLASSGEN_SOCKET" in os.environ:
+        return os.environ["CPPCLASSGEN_SOCKET"]
+    directory = os.environ.get("XDG_RUNTIME_DIR", "/tmp")
+    return os.path.join(directory, f"cppclassgen-{os.getuid()}.sock")
+
+
+def request_daemon(request: dict, socket_path: str) -> dict | None:
+    """Sends a request to the generator daemon and returns its response, or None if no daemon is running."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(socket_path)
+            connection.sendall(json.dumps(request).encode() + b"\n")
+            with connection.makefile("rb") as response:
+                line = response.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def generate(request: dict, socket_path: str | None = None) -> dict:
+    """Handles a generate request (see `pipeline.handle_request`) on the daemon if one is running, otherwise in this process."""
+    response = request_daemon(request, socket_path or default_socket_path())
+    if response is None:
+        # Imported here so the generator is only loaded when there is no daemon to do the work
+        from pipeline import handle_request
+        response = handle_request(request)
+    return response
+
+
+def manage_arguments() -> tuple[dict, str | None]:
+    """Manage command line arguments for the client. Takes the same emmet, location, `-o` and `-a` arguments as the generator,
+    plus `-render` to print the rendered files instead of writing them, and `-socket {path}` to choose the daemon socket.
+    Returns: the request and the socket path as a tuple."""
+    request = {"options": {"override": False, "append": False}, "write": True}
+    socket_path = None
+    positional = []
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-override" or arg == "-o":
+            request["options"]["override"] = True
+        elif arg == "-append" or arg == "-a":
+            request["options"]["append"] = True
+        elif arg == "-render":
+            request["write"] = False
+        elif arg == "-socket":
+            i += 1
+            if i >= len(args):
+                print("No socket path provided.")
+                exit(1)
+            socket_path = args[i]
+        elif arg.startswith('-'):
+            print(f"Unknown argument: {arg}")
+        else:
+            positional.append(arg)
+        i += 1
+    if not positional:
+        print("No emmet provided.")
+        exit(1)
+    request["emmet"] = positional[0]
+    # Resolved here, as a daemon resolves relative paths against its own working directory
+    request["location"] = os.path.abspath(positional[1] if len(positional) > 1 else ".")
+    return request, socket_path
+
+
+def main():
+    request, socket_path = manage_arguments()
+    response = generate(request, socket_path)
+    print(json.dumps(response))
+    if response["status"] == "error":
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+from typing import Iterator
+
+# Accessor policies: `copy` returns members by value and takes them by const reference, `efficient` passes each type
+# the cheapest way according to its classification
+ACCESSOR_POLICIES = ("copy", "efficient")
+
+# Types that are cheap to copy (fundamental types, fixed width integers and non-owning views), so they are returned
+# and set by value. Types ending in `*` or `&` are also trivial. Every other type, including std containers, smart
+# pointers, user classes and template parameters such as `T`, is non-trivial: it is returned by const reference and set
+# by value then moved into place.
+TRIVIAL_TYPES = {
+    "bool", "char", "signed char", "unsigned char", "char8_t", "char16_t", "char32_t", "wchar_t",
+    "short", "unsigned short", "int", "unsigned", "unsigned int",
+    "long", "unsigned long", "long long", "unsigned long long",
+    "float", "double", "long double",
+    "int8_t", "uint8_t", "int16_t", "uint16_t", "int32_t", "uint32_t", "int64_t", "uint64_t",
+    "size_t", "ptrdiff_t", "intptr_t", "uintptr_t", "nullptr_t", "byte",
+    "string_view",
+}
+LEADING_CV = re.compile(r"(?:(?:const|volatile)\s+)+")
+TRAILING_CV = re.compile(r"(?:\s*\b(?:const|volatile))+\s*$")
+
+
+def split_cv(type_name: str) -> tuple[str, set[str]]:
+    """Splits a type into the type without its top-level `const` and `volatile`, and those qualifiers, e.g. (`string`,
+    {`const`}) for `const string` and (`int*`, {`const`}) for `int* const`. A leading qualifier of a pointer or reference
+    type qualifies what it points to, so it is kept, e.g. (`const int*`, {}) for `const int*`."""
+    qualifiers = set()
+    match = TRAILING_CV.search(type_name)
+    if match:
+        qualifiers.update(match.group().split())
+        type_name = type_name[:match.start()]
+    if not type_name.endswith("*") and not type_name.endswith("&"):
+        match = LEADING_CV.match(type_name)
+        if match:
+            qualifiers.update(match.group().split())
+            type_name = type_name[match.end():]
+    return type_name, qualifiers
+
+
+def const_reference(type_name: str) -> str:
+    """Returns a const reference to a type, e.g. `const string &`, without repeating a `const` the type already has."""
+    if "const" in split_cv(type_name)[1]:
+        return f"{type_name} &"
+    # The leading `const` of a pointer type qualifies the pointee, so the pointer is made const after it
+    if LEADING_CV.match(type_name):
+        return f"{type_name} const &"
+    return f"const {type_name} &"
+
+
+@lru_cache(maxsize=None)
+def is_trivial(type_name: str) -> bool:
+    """Checks whether a member type is cheap enough to copy that its accessors should pass it by value. Top-level `const`
+    and `volatile` do not change how a type is passed, so they are ignored."""
+    type_name, _ = split_cv(" ".join(type_name.split()))
+    # Pointers are copied, and references cannot be re-qualified, so both are passed as written
+    if type_name.endswith("*") or type_name.endswith("&"):
+        return True
+    if type_name.startswith("std::"):
+        type_name = type_name[5:]
+    return type_name in TRIVIAL_TYPES
+
+
+# Names of std types (with `std::` removed) that are not user classes, even when they have no include association
+STD_TYPE_NAMES = {
+    "string", "wstring", "u8string", "u16string", "u32string", "vector", "array", "deque", "list", "forward_list",
+    "map", "multimap", "set", "multiset", "unordered_map", "unordered_multimap", "unordered_set", "unordered_multiset",
+    "stack", "queue", "priority_queue", "span", "pair", "tuple", "optional", "variant", "any", "function",
+    "unique_ptr", "shared_ptr", "weak_ptr", "bitset", "complex", "atomic", "mutex", "thread",
+}
+# Smart pointers that may be members while their pointee is incomplete, so the pointee only needs a forward declaration.
+# `unique_ptr` is not one of them, as the implicitly defined destructor of the class needs the complete pointee.
+INCOMPLETE_POINTEES = {"shared_ptr", "weak_ptr"}
+USER_TYPE_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+TYPE_TOKEN = re.compile(r"[<>,]|[^<>,]+")
+DECLARATOR_TOKEN = re.compile(r"[*&]|[^\s*&]+")
+
+
+@dataclass(repr=True, frozen=True, slots=True)
+class TypeExpr:
+    """Class to represent a parsed C++ type, e.g. `map<string, vector<Foo*>>`. `name` has `const` removed, `args` are the
+    template arguments (which may be values, such as the `3` of `array<int, 3>`), and `declarator` holds any trailing `*`
+    and `&`."""
+    name: str
+    args: tuple["TypeExpr", ...] = ()
+    declarator: str = ""
+
+    @property
+    def base_name(self) -> str:
+        """The name without a leading `std::`."""
+        return self.name[5:] if self.name.startswith("std::") else self.name
+
+    @property
+    def indirect(self) -> bool:
+        return "*" in self.declarator or "&" in self.declarator
+
+    def walk(self) -> Iterator["TypeExpr"]:
+        """Yields this type and every type nested in its template arguments, outermost first."""
+        yield self
+        for arg in self.args:
+            yield from arg.walk()
+
+
+class TypeParser:
+    """Recursive descent parser for C++ types, splitting template arguments on top level commas only."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = TYPE_TOKEN.findall(text)
+        self.position = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ""
+
+    def parse(self) -> TypeExpr:
+        type_expr = self.parse_type()
+        if self.peek():
+            raise ValueError(f"Unexpected '{self.peek()}' in type {self.text}")
+        return type_expr
+
+    def parse_type(self) -> TypeExpr:
+        """Parses `{name}<{arg}, {arg}...>{declarator}`, where the arguments and declarator are optional."""
+        chunk = self.peek()
+        if chunk in ("", "<", ">", ","):
+            raise ValueError(f"Expected a type in {self.text}")
+        self.position += 1
+        args = []
+        if self.peek() == "<":
+            self.position += 1
+            while True:
+                args.append(self.parse_type())
+                token = self.peek()
+                self.position += 1
+                if token == ">":
+                    break
+                if token != ",":
+                    raise ValueError(f"Unclosed '<' in type {self.text}")
+            # Anything after the closing bracket is part of the declarator, e.g. `*` or ` const&`
+            if self.peek() not in ("", "<", ">", ","):
+                chunk += self.peek()
+                self.position += 1
+        name, declarator = split_declarator(chunk)
+        return TypeExpr(name, tuple(args), declarator)
+
+
+def split_declarator(text: str) -> tuple[str, str]:
+    """Splits the text of a type (without its template arguments) into its name and its `*`/`&` declarator, removing
+    `const`, e.g. `const Foo *` into (`Foo`, `*`)."""
+    tokens = DECLARATOR_TOKEN.findall(text)
+    name = []
+    declarator = ""
+    for token in tokens:
+        if token in ("*", "&"):
+            declarator += token
+        elif token != "const" and not declarator:
+            name.append(token)
+    return " ".join(name), declarator
+
+
+@lru_cache(maxsize=None)
+def parse_type(text: str) -> TypeExpr:
+    """Parses a C++ type such as `std::map<string, vector<Foo*>>` into a TypeExpr, raising ValueError if it is malformed."""
+    return TypeParser(text).parse()
+
+
+def user_type_uses(type_expr: TypeExpr, template_parameters: tuple[str, ...] = ()) -> Iterator[tuple[str, bool]]:
+    """Yields (name, needs definition) for each use of a user class in a type. A use needs the class's definition unless
+    it is through a pointer, a reference, or a smart pointer that allows an incomplete pointee. Namespaced names are not
+    yielded, as they cannot be forward declared on their own."""
+    def visit(node: TypeExpr, indirect: bool) -> Iterator[tuple[str, bool]]:
+        indirect = indirect or node.indirect
+        if (USER_TYPE_NAME.fullmatch(node.name) and node.name not in TRIVIAL_TYPES
+                and node.name not in STD_TYPE_NAMES and node.name not in template_parameters):
+            yield node.name, not indirect
+        through_pointer = node.base_name in INCOMPLETE_POINTEES
+        for arg in node.args:
+            yield from visit(arg, indirect or through_pointer)
+    yield from visit(type_expr, False)
@@ -0,0 +1,68 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+from client import default_socket_path
+from pipeline import handle_request
+
+
+class GeneratorRequestHandler(socketserver.StreamRequestHandler):
+    """Handles a connection to the generator daemon. Each line received is a JSON generate request, and each is answered
+    with a single line of JSON, so a client may send several requests over one connection."""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = handle_request(json.loads(line))
+            except ValueError as error:
+                response = {"class": None, "status": "error",
+                            "error": f"{type(error).__name__}: {error}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class GeneratorDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-lived server that keeps the generator loaded and handles generate requests over a Unix domain socket."""
+    daemon_threads = True
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """Removes a socket left behind by a daemon that is no longer running. Exits if a daemon is still listening on it."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(socket_path)
+        except ConnectionRefusedError:
+            os.remove(socket_path)
+            return
+    print(f"A generator daemon is already running on {socket_path}.")
+    exit(1)
+
+
+def serve(socket_path: str) -> None:
+    """Runs the generator daemon on the given socket until interrupted."""
+    remove_stale_socket(socket_path)
+    # Only the current user may connect, as requests can write files
+    previous_umask = os.umask(0o177)
+    try:
+        server = GeneratorDaemon(socket_path, GeneratorRequestHandler)
+    finally:
+        os.umask(previous_umask)
+    print(f"Generator daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def main():
+    serve(sys.argv[1] if len(sys.argv) > 1 else default_socket_path())
+
+
+if __name__ == "__main__":
+    main()
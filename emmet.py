@@ -0,0 +1,224 @@
+from dataclasses import dataclass, field
+import re
+
+# Tokens are matched in place with `pattern.match(emmet, position)`, so the emmet is only walked once
+IDENTIFIER = re.compile(r"[a-zA-Z0-9_]+")
+PARENT_NAME = re.compile(r"[a-zA-Z0-9_:]+")
+# A count followed by the start of its type, up to the first bracket
+GROUP = re.compile(r"([0-9]+)([^0-9<>;]*)")
+FLAGS = re.compile(r"[a-zA-Z]*")
+# Characters of a type up to the next count, bracket or attribute set
+TYPE_CHUNK = re.compile(r"[^0-9<>;]+")
+# Characters inside template brackets (digits are part of the type there)
+BRACKET_CHUNK = re.compile(r"[^<>;]+")
+# Characters of an explicit instantiation type outside of template brackets, e.g. `std::string` or `int*`
+INSTANTIATION_CHUNK = re.compile(r"[a-zA-Z0-9_:*& ]+")
+PARENT_SYMBOLS = "+-="
+ATTRIBUTE_FLAGS = "gsi"
+
+
+class EmmetSyntaxError(ValueError):
+    """Error raised when an emmet cannot be parsed. Records the position in the emmet where the problem was found."""
+
+    def __init__(self, message: str, emmet: str, position: int) -> None:
+        self.message = message
+        self.emmet = emmet
+        self.position = position
+        super().__init__(
+            f"{message} at position {position}\n\t{emmet}\n\t{' ' * position}^")
+
+
+@dataclass(repr=True, slots=True)
+class ParentNode:
+    """Class to represent a parent class in a parsed emmet, e.g. `+Horse?`."""
+    symbol: str
+    name: str
+    virtual: bool
+    position: int
+
+
+@dataclass(repr=True, slots=True)
+class AttributeGroupNode:
+    """Class to represent a number of attributes of the same type in a parsed emmet, e.g. `4int`."""
+    count: int
+    type: str
+    position: int
+
+
+@dataclass(repr=True, slots=True)
+class AttributeSetNode:
+    """Class to represent an attribute set in a parsed emmet: its getter/setter/inline flags and groups, e.g. `gsi4int3float`."""
+    getter: bool
+    setter: bool
+    groups: list[AttributeGroupNode]
+    position: int
+    # Whether the accessors are defined in the class body rather than in the `.cpp`
+    inline: bool = False
+
+
+@dataclass(repr=True, slots=True)
+class ClassNode:
+    """Class to represent a whole parsed emmet. `specialisation` is None for non-template classes and primary templates."""
+    name: str
+    template: bool
+    specialisation: str | None
+    parents: list[ParentNode] = field(default_factory=list)
+    attribute_sets: list[AttributeSetNode] = field(default_factory=list)
+    # Template arguments to explicitly instantiate the class with, e.g. `int` and `double` for `Foo<>@int@double`
+    instantiations: list[str] = field(default_factory=list)
+
+
+def parse_class_name(emmet: str) -> str:
+    """Extracts the class name from the start of an emmet without parsing the rest of it."""
+    match = IDENTIFIER.match(emmet)
+    if match is None:
+        raise EmmetSyntaxError("Expected class name", emmet, 0)
+    return match.group()
+
+
+class EmmetParser:
+    """Single pass parser for emmet descriptions. Walks the emmet once from left to right and builds a ClassNode."""
+
+    def __init__(self, emmet: str) -> None:
+        self.emmet = emmet
+        self.position = 0
+
+    def error(self, message: str, position: int | None = None) -> EmmetSyntaxError:
+        """Creates a syntax error at the given position (the current position by default)."""
+        return EmmetSyntaxError(message, self.emmet, self.position if position is None else position)
+
+    def peek(self) -> str:
+        """Returns the current character, or "" at the end of the emmet."""
+        return self.emmet[self.position:self.position + 1]
+
+    def expect(self, pattern: re.Pattern, message: str) -> str:
+        """Matches the pattern at the current position and moves past it, raising an error if it does not match."""
+        match = pattern.match(self.emmet, self.position)
+        if match is None or match.end() == self.position:
+            raise self.error(message)
+        self.position = match.end()
+        return match.group()
+
+    def parse_brackets(self) -> str:
+        """Parses a balanced `<...>` section starting at the current `<`, returning the text between the outer brackets."""
+        start = self.position
+        depth = 0
+        while True:
+            character = self.peek()
+            if character == "<":
+                depth += 1
+                self.position += 1
+            elif character == ">":
+                depth -= 1
+                self.position += 1
+                if depth == 0:
+                    return self.emmet[start + 1:self.position - 1]
+            elif character == "" or character == ";":
+                raise self.error("Unclosed '<'", start)
+            else:
+                match = BRACKET_CHUNK.match(self.emmet, self.position)
+                self.position = match.end()
+
+    def parse(self) -> ClassNode:
+        """Parses the whole emmet in the format `{className}<{specialisation}>@{instantiation}...{parents};{attribute set};...`."""
+        name = self.expect(IDENTIFIER, "Expected class name")
+        template = False
+        specialisation = None
+        if self.peek() == "<":
+            template = True
+            specialisation = self.parse_brackets().strip() or None
+        node = ClassNode(name, template, specialisation)
+        while self.peek() == "@":
+            if not template or specialisation is not None:
+                raise self.error("Explicit instantiations can only be listed for a basic template (`<>`)")
+            self.position += 1
+            node.instantiations.append(self.parse_instantiation())
+        while self.peek() in PARENT_SYMBOLS and self.peek() != "":
+            node.parents.append(self.parse_parent())
+        if self.peek() not in ("", ";"):
+            raise self.error(f"Unexpected character '{self.peek()}'")
+        while self.peek() == ";":
+            self.position += 1
+            node.attribute_sets.append(self.parse_attribute_set())
+        return node
+
+    def parse_instantiation(self) -> str:
+        """Parses the template argument of an explicit instantiation after an `@`, e.g. `int` or `vector<string>`."""
+        start = self.position
+        while True:
+            character = self.peek()
+            if character == "<":
+                self.parse_brackets()
+            elif character == ">":
+                raise self.error("Unmatched '>'")
+            else:
+                match = INSTANTIATION_CHUNK.match(self.emmet, self.position)
+                if match is None or match.end() == self.position:
+                    break
+                self.position = match.end()
+        instantiation = self.emmet[start:self.position].strip()
+        if not instantiation:
+            raise self.error("Expected instantiation type", start)
+        return instantiation
+
+    def parse_parent(self) -> ParentNode:
+        """Parses a parent class in the format `{symbol}{parentClassName}?`."""
+        position = self.position
+        symbol = self.peek()
+        self.position += 1
+        name = self.expect(PARENT_NAME, "Expected parent class name")
+        if self.peek() == "<":
+            name += "<" + self.parse_brackets() + ">"
+        virtual = self.peek() == "?"
+        if virtual:
+            self.position += 1
+        return ParentNode(symbol, name, virtual, position)
+
+    def parse_attribute_set(self) -> AttributeSetNode:
+        """Parses an attribute set in the format `gsi{num1}{type1}{num2}{type2}...`."""
+        position = self.position
+        flags = FLAGS.match(self.emmet, self.position).group()
+        for offset, flag in enumerate(flags):
+            if flag not in ATTRIBUTE_FLAGS:
+                raise self.error(f"Unknown attribute flag '{flag}'", position + offset)
+            if flag in flags[:offset]:
+                raise self.error(f"Repeated attribute flag '{flag}'", position + offset)
+        self.position += len(flags)
+        attribute_set = AttributeSetNode(
+            "g" in flags, "s" in flags, [], position, "i" in flags)
+        if self.peek() in ("", ";"):
+            raise self.error("Expected attribute count")
+        while self.peek() not in ("", ";"):
+            attribute_set.groups.append(self.parse_attribute_group())
+        return attribute_set
+
+    def parse_attribute_group(self) -> AttributeGroupNode:
+        """Parses a number of attributes followed by their type, e.g. `4int`. The type ends at the next number outside of
+        template brackets, so `2vector<int>1array<int,3>` is two groups."""
+        position = self.position
+        match = GROUP.match(self.emmet, position)
+        if match is None:
+            raise self.error("Expected attribute count")
+        count = int(match.group(1))
+        type_start = match.start(2)
+        self.position = match.end()
+        # Only types with template brackets need to be walked further
+        while True:
+            character = self.peek()
+            if character == "<":
+                self.parse_brackets()
+            elif character == ">":
+                raise self.error("Unmatched '>'")
+            elif character == "" or character == ";" or character.isdigit():
+                break
+            else:
+                self.position = TYPE_CHUNK.match(self.emmet, self.position).end()
+        attribute_type = self.emmet[type_start:self.position].strip()
+        if not attribute_type:
+            raise self.error("Expected attribute type", type_start)
+        return AttributeGroupNode(count, attribute_type, position)
+
+
+def parse_emmet(emmet: str) -> ClassNode:
+    """Parses an emmet description into a ClassNode, raising EmmetSyntaxError with the position of any problem."""
+    return EmmetParser(emmet).parse()
@@ -1,53 +1,276 @@
+import cProfile
 import sys
 from CPPClassCreator import CPPClassCreator
+from batch import run_batch, with_batch_classes
+from classgraph import ClassGraph
+from cpptypes import ACCESSOR_POLICIES
+from manifest import ManifestEntry, load_manifest
+from pipeline import run_stream
+from preview import run_preview
+import profiling
+from unity import strip_std_includes, write_build_files
 
 
-def manage_arguments() -> tuple[str, str, dict[str, bool]]:
+def manage_arguments() -> tuple[str | None, str, dict[str, bool | int | str | None]]:
     """Manage command line arguments for the C++ class generator. Gets the emmet description, location, and options.
-    Options include: forced override. Returns: description, location, and a dictionary of options as a tuple."""
+    Options include: forced override, append, a manifest file for batch generation, the number of processes to use,
+    streaming emmets from stdin, ignoring or pruning the incremental generation cache, profiling, previewing
+    the changes without writing any files, reordering members to minimise padding, the accessor policy, checking
+    and ordering a batch by its class graph, unity builds with a shared precompiled header,
+    struct-of-arrays containers, and the classes generated alongside this one.
+    Returns: description, location, and a dictionary of options as a tuple."""
     # Default options
     options = {
         "override": False,
-        "append": False
+        "append": False,
+        "manifest": None,
+        "jobs": 1,
+        "stream": False,
+        "force": False,
+        "gc": False,
+        "profile": False,
+        "cprofile": None,
+        "dry_run": False,
+        "diff": False,
+        "layout": None,
+        "size_guard": False,
+        "accessors": "copy",
+        "graph": False,
+        "external": [],
+        "depfile": None,
+        "unity": None,
+        "pch": None,
+        "strip_std_includes": False,
+        "include_guards": False,
+        "soa": False,
+        "classes": None
     }
-    # Get emmet
-    desc = sys.argv[1] if len(sys.argv) > 1 else None
-    if desc is None:
-        print("No emmet provided.")
-        exit(1)
-    # Get location if exists
-    location = "."
-    if len(sys.argv) < 3:
-        return desc, location, options
-    options_index_start = 2
-    if sys.argv[2][0] != '-':
-        location = sys.argv[2]
-        options_index_start = 3
-    # Get options
-    for arg in sys.argv[options_index_start:]:
+    # Split arguments into positional arguments and options
+    positional = []
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
         if arg.startswith('-'):
             if arg == "-override" or arg == "-o":
                 options["override"] = True
-            if arg == "-append" or arg == "-a":
+            elif arg == "-append" or arg == "-a":
                 options["append"] = True
+            elif arg == "-manifest" or arg == "-m":
+                i += 1
+                if i >= len(args):
+                    print("No manifest file provided.")
+                    exit(1)
+                options["manifest"] = args[i]
+            elif arg == "-force" or arg == "-f":
+                options["force"] = True
+            elif arg == "-gc":
+                options["gc"] = True
+            elif arg == "-dry-run" or arg == "-n":
+                options["dry_run"] = True
+            elif arg == "-diff":
+                options["diff"] = True
+            elif arg == "-layout":
+                i += 1
+                if i >= len(args):
+                    print("No ABI provided for -layout.")
+                    exit(1)
+                options["layout"] = args[i]
+            elif arg == "-size-guard":
+                options["size_guard"] = True
+            elif arg == "-accessors":
+                i += 1
+                if i >= len(args) or args[i] not in ACCESSOR_POLICIES:
+                    print(
+                        f"-accessors requires one of {', '.join(ACCESSOR_POLICIES)}.")
+                    exit(1)
+                options["accessors"] = args[i]
+            elif arg == "-profile":
+                options["profile"] = True
+            elif arg == "-cprofile":
+                i += 1
+                if i >= len(args):
+                    print("No cProfile output file provided.")
+                    exit(1)
+                options["cprofile"] = args[i]
+            elif arg == "-graph":
+                options["graph"] = True
+            elif arg == "-external":
+                i += 1
+                if i >= len(args):
+                    print("No class names provided for -external.")
+                    exit(1)
+                options["graph"] = True
+                options["external"] += [name.strip()
+                                        for name in args[i].split(",") if name.strip()]
+            elif arg == "-depfile":
+                i += 1
+                if i >= len(args):
+                    print("No depfile provided.")
+                    exit(1)
+                options["graph"] = True
+                options["depfile"] = args[i]
+            elif arg == "-unity":
+                i += 1
+                if i >= len(args) or not args[i].isdigit() or int(args[i]) < 1:
+                    print("-unity requires a positive number of classes per file.")
+                    exit(1)
+                options["unity"] = int(args[i])
+                # A unity file includes several classes' headers, so each must be guarded
+                options["include_guards"] = True
+            elif arg == "-pch":
+                i += 1
+                if i >= len(args):
+                    print("No precompiled header file provided.")
+                    exit(1)
+                options["pch"] = args[i]
+            elif arg == "-strip-std-includes":
+                options["strip_std_includes"] = True
+            elif arg == "-classes":
+                i += 1
+                if i >= len(args):
+                    print("No class names provided for -classes.")
+                    exit(1)
+                options["classes"] = (options["classes"] or []) + \
+                    [name.strip() for name in args[i].split(",") if name.strip()]
+            elif arg == "-soa":
+                options["soa"] = True
+            elif arg == "-stream":
+                options["stream"] = True
+            elif arg == "-jobs" or arg == "-j":
+                i += 1
+                if i >= len(args) or not args[i].isdigit() or int(args[i]) < 1:
+                    print("-jobs requires a positive number of processes.")
+                    exit(1)
+                options["jobs"] = int(args[i])
+            else:
+                print(f"Unknown argument: {arg}")
         else:
-            print(f"Unknown argument: {arg}")
+            positional.append(arg)
+        i += 1
 
     # Check for invalid option combinations
+    if options["size_guard"] and options["layout"] is None:
+        print("-size-guard requires -layout.")
+        exit(1)
     if options["append"] and options["override"]:
         print("Cannot use -append and -override at the same time.")
         exit(1)
 
+    if options["manifest"] is not None and options["stream"]:
+        print("Cannot use -manifest and -stream at the same time.")
+        exit(1)
+    if options["graph"] and options["manifest"] is None:
+        print("-graph, -external and -depfile require -manifest.")
+        exit(1)
+    if (options["unity"] is not None or options["pch"] is not None) and options["manifest"] is None:
+        print("-unity and -pch require -manifest.")
+        exit(1)
+    if options["strip_std_includes"] and options["pch"] is None:
+        print("-strip-std-includes requires -pch.")
+        exit(1)
+    if options["stream"] and (options["dry_run"] or options["diff"]):
+        print("Cannot use -dry-run or -diff with -stream.")
+        exit(1)
+
+    # In manifest and stream mode the only positional argument is the default location
+    if options["manifest"] is not None or options["stream"]:
+        desc = None
+        location = positional[0] if positional else "."
+        extra = positional[1:]
+    else:
+        # Get emmet
+        if not positional:
+            print("No emmet provided.")
+            exit(1)
+        desc = positional[0]
+        # Get location if exists
+        location = positional[1] if len(positional) > 1 else "."
+        extra = positional[2:]
+    for arg in extra:
+        print(f"Unknown argument: {arg}")
+
     return desc, location, options
 
 
-def main():
-    # Input emmet description of C++ class
-    desc, location, options = manage_arguments()
+def plan_batch(entries: list[ManifestEntry], options: dict[str, bool | int | str | None]) -> ClassGraph:
+    """Checks the class graph of a batch, exiting if a class is missing or the headers include each other in a cycle.
+    Warns about duplicated base classes and returns the graph, whose `topological_order` is the order to generate in."""
+    graph = ClassGraph(entries, options)
+    if graph.errors:
+        for error in graph.errors:
+            print(error)
+        exit(1)
+    for warning in graph.find_diamonds():
+        print(warning)
+    return graph
+
+
+def generate(desc: str | None, location: str, options: dict[str, bool | int | str | None]) -> None:
+    """Generates the classes described by the command line arguments."""
+    if options["profile"]:
+        profiling.enable()
+    # Show what would be generated without writing anything
+    if options["dry_run"] or options["diff"]:
+        if options["manifest"] is not None:
+            entries = load_manifest(options["manifest"], location)
+            options = with_batch_classes(entries, options)
+            if options["strip_std_includes"]:
+                strip_std_includes(entries, options["pch"])
+            if options["graph"]:
+                entries = plan_batch(entries, options).topological_order()
+        else:
+            entries = [ManifestEntry(desc, location)]
+        changed = run_preview(entries, options, options["diff"])
+        # Like diff, exit with an error when there are differences
+        if options["diff"] and changed:
+            exit(1)
+        return
+    # Generate each class as it arrives on stdin, reporting its status on stdout
+    if options["stream"]:
+        run_stream(sys.stdin, sys.stdout, options, location)
+        return
+    # Generate every class in the manifest, optionally across several processes
+    if options["manifest"] is not None:
+        entries = load_manifest(options["manifest"], location)
+        options = with_batch_classes(entries, options)
+        graph = None
+        # Before the graph, so it finds the cache entries of unchanged classes under the same keys as the batch
+        if options["strip_std_includes"]:
+            strip_std_includes(entries, options["pch"])
+        if options["graph"]:
+            graph = plan_batch(entries, options)
+            entries = graph.topological_order()
+        results = run_batch(entries, options, options["jobs"])
+        # Written once the classes it lists exist
+        if options["depfile"] is not None:
+            graph.write_depfile(options["depfile"])
+        if options["unity"] is not None or options["pch"] is not None:
+            write_build_files(results, options, location)
+        return
     # Create ClassDescription object
-    creator = CPPClassCreator(desc)
+    creator = CPPClassCreator(desc, options)
     creator.create_hpp_file(location, options)
     creator.create_cpp_file(location, options)
+    creator.create_soa_file(location, options)
+    if options["profile"]:
+        profiling.emit(creator.profile.to_dict())
+
+
+def main():
+    # Input emmet description of C++ class
+    desc, location, options = manage_arguments()
+    try:
+        if options["cprofile"] is not None:
+            # Profile the whole run, saving the statistics for `pstats` (or any tool that reads them)
+            cProfile.runctx("generate(desc, location, options)",
+                            globals(), locals(), options["cprofile"])
+        else:
+            generate(desc, location, options)
+    except ValueError as error:
+        # Malformed emmets (EmmetSyntaxError), manifests and options
+        print(error)
+        exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+import json
+
+CACHE_LINE_SIZE = 64
+
+# (size, alignment) in bytes of fundamental and common std types for each target ABI. `pointer` is used for raw pointers
+# and references, and `T*`-like std types are listed by their template name. std types follow libstdc++ (lp64, ilp32)
+# and MSVC (llp64).
+ABIS: dict[str, dict[str, tuple[int, int]]] = {
+    # 64-bit Linux and macOS
+    "lp64": {
+        "bool": (1, 1), "char": (1, 1), "signed char": (1, 1), "unsigned char": (1, 1), "char8_t": (1, 1),
+        "char16_t": (2, 2), "char32_t": (4, 4), "wchar_t": (4, 4),
+        "short": (2, 2), "unsigned short": (2, 2), "int": (4, 4), "unsigned": (4, 4), "unsigned int": (4, 4),
+        "long": (8, 8), "unsigned long": (8, 8), "long long": (8, 8), "unsigned long long": (8, 8),
+        "float": (4, 4), "double": (8, 8), "long double": (16, 16),
+        "int8_t": (1, 1), "uint8_t": (1, 1), "int16_t": (2, 2), "uint16_t": (2, 2),
+        "int32_t": (4, 4), "uint32_t": (4, 4), "int64_t": (8, 8), "uint64_t": (8, 8),
+        "size_t": (8, 8), "ptrdiff_t": (8, 8), "intptr_t": (8, 8), "uintptr_t": (8, 8),
+        "pointer": (8, 8), "string": (32, 8), "vector": (24, 8),
+        "unique_ptr": (8, 8), "shared_ptr": (16, 8), "weak_ptr": (16, 8),
+    },
+    # 32-bit x86 Linux
+    "ilp32": {
+        "bool": (1, 1), "char": (1, 1), "signed char": (1, 1), "unsigned char": (1, 1), "char8_t": (1, 1),
+        "char16_t": (2, 2), "char32_t": (4, 4), "wchar_t": (4, 4),
+        "short": (2, 2), "unsigned short": (2, 2), "int": (4, 4), "unsigned": (4, 4), "unsigned int": (4, 4),
+        "long": (4, 4), "unsigned long": (4, 4), "long long": (8, 4), "unsigned long long": (8, 4),
+        "float": (4, 4), "double": (8, 4), "long double": (12, 4),
+        "int8_t": (1, 1), "uint8_t": (1, 1), "int16_t": (2, 2), "uint16_t": (2, 2),
+        "int32_t": (4, 4), "uint32_t": (4, 4), "int64_t": (8, 4), "uint64_t": (8, 4),
+        "size_t": (4, 4), "ptrdiff_t": (4, 4), "intptr_t": (4, 4), "uintptr_t": (4, 4),
+        "pointer": (4, 4), "string": (24, 4), "vector": (12, 4),
+        "unique_ptr": (4, 4), "shared_ptr": (8, 4), "weak_ptr": (8, 4),
+    },
+    # 64-bit Windows
+    "llp64": {
+        "bool": (1, 1), "char": (1, 1), "signed char": (1, 1), "unsigned char": (1, 1), "char8_t": (1, 1),
+        "char16_t": (2, 2), "char32_t": (4, 4), "wchar_t": (2, 2),
+        "short": (2, 2), "unsigned short": (2, 2), "int": (4, 4), "unsigned": (4, 4), "unsigned int": (4, 4),
+        "long": (4, 4), "unsigned long": (4, 4), "long long": (8, 8), "unsigned long long": (8, 8),
+        "float": (4, 4), "double": (8, 8), "long double": (8, 8),
+        "int8_t": (1, 1), "uint8_t": (1, 1), "int16_t": (2, 2), "uint16_t": (2, 2),
+        "int32_t": (4, 4), "uint32_t": (4, 4), "int64_t": (8, 8), "uint64_t": (8, 8),
+        "size_t": (8, 8), "ptrdiff_t": (8, 8), "intptr_t": (8, 8), "uintptr_t": (8, 8),
+        "pointer": (8, 8), "string": (32, 8), "vector": (24, 8),
+        "unique_ptr": (8, 8), "shared_ptr": (16, 8), "weak_ptr": (16, 8),
+    },
+}
+
+
+def load_abi(abi: str) -> dict[str, tuple[int, int]]:
+    """Returns the type table for an ABI name, or loads one from a JSON file in the format `{"type": [size, alignment]}`.
+    Types missing from a JSON table fall back to `lp64`."""
+    if abi in ABIS:
+        return ABIS[abi]
+    if abi.endswith(".json"):
+        with open(abi) as file:
+            table = json.load(file)
+        return {**ABIS["lp64"], **{type_name: tuple(value) for type_name, value in table.items()}}
+    raise ValueError(
+        f"Unknown ABI {abi}. Use one of {', '.join(ABIS)} or a JSON file.")
+
+
+def type_layout(type_name: str, table: dict[str, tuple[int, int]]) -> tuple[int, int] | None:
+    """Returns the (size, alignment) of a member type, or None if it is not known (e.g. user types and template parameters)."""
+    type_name = " ".join(type_name.replace("const ", "").split())
+    if type_name.endswith("*") or type_name.endswith("&"):
+        return table["pointer"]
+    if type_name.startswith("std::"):
+        type_name = type_name[5:]
+    # Templates are looked up by name, e.g. `vector<int>` as `vector`
+    return table.get(type_name.split("<")[0].strip())
+
+
+@dataclass(repr=True)
+class ClassLayout:
+    """Class to represent the estimated layout of a class's members. Only members of known types are included, so the
+    estimate is only exact when `complete` is true (no unknown types and no base classes)."""
+    size: int
+    alignment: int
+    padding: int
+    has_parents: bool
+    unknown_types: list[str] = field(default_factory=list)
+    # The layout of the same members in emmet order, for comparison
+    original_size: int = 0
+    original_padding: int = 0
+
+    @property
+    def complete(self) -> bool:
+        return not self.unknown_types and not self.has_parents
+
+    @property
+    def cache_lines(self) -> int:
+        return -(-self.size // CACHE_LINE_SIZE)
+
+    def describe(self, name: str) -> str:
+        """Returns a one line report of the layout of the class."""
+        report = (f"Layout of {name}: sizeof ~{self.size} bytes, {self.padding} padding bytes, "
+                  f"{self.cache_lines} cache line{'s' if self.cache_lines != 1 else ''} "
+                  f"(emmet order: {self.original_size} bytes, {self.original_padding} padding bytes)")
+        if not self.complete:
+            excluded = self.unknown_types + \
+                (["base classes"] if self.has_parents else [])
+            report += ", estimate excludes " + ", ".join(excluded)
+        return report
+
+
+def measure(members: list[tuple[int, int, int]]) -> tuple[int, int, int]:
+    """Lays out (size, alignment, count) member runs in order, returning the (size, alignment, padding) of the class."""
+    offset = 0
+    alignment = 1
+    padding = 0
+    for size, align, count in members:
+        if count == 0:
+            continue
+        aligned = -(-offset // align) * align
+        padding += aligned - offset
+        offset = aligned + size * count
+        alignment = max(alignment, align)
+    size = -(-offset // alignment) * alignment if offset else 1
+    padding += size - offset if offset else 0
+    return size, alignment, padding
+
+
+def optimise_order(groups: list, table: dict[str, tuple[int, int]]) -> list:
+    """Returns attribute groups ordered to minimise padding: known types by decreasing alignment, then size, followed by
+    groups of unknown types in their original order. The sort is stable, so equal groups keep their emmet order."""
+    known = []
+    unknown = []
+    for group in groups:
+        layout = type_layout(group.type, table)
+        if layout is None:
+            unknown.append(group)
+        else:
+            known.append((layout, group))
+    known.sort(key=lambda item: (-item[0][1], -item[0][0]))
+    return [group for _, group in known] + unknown
+
+
+def compute_layout(original: list, ordered: list, table: dict[str, tuple[int, int]], has_parents: bool) -> ClassLayout:
+    """Estimates the layout of the attribute groups in `ordered`, compared with the same groups in `original` order."""
+    def runs(groups: list) -> list[tuple[int, int, int]]:
+        members = []
+        for group in groups:
+            layout = type_layout(group.type, table)
+            if layout is not None:
+                members.append((layout[0], layout[1], group.count))
+        return members
+
+    unknown_types = list(dict.fromkeys(group.type for group in original
+                                       if group.count and type_layout(group.type, table) is None))
+    size, alignment, padding = measure(runs(ordered))
+    original_size, _, original_padding = measure(runs(original))
+    return ClassLayout(size, alignment, padding, has_parents, unknown_types, original_size, original_padding)
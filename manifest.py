@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+import json
+import os
+import tomllib
+
+
+@dataclass(repr=True)
+class ManifestEntry:
+    """Class to represent a single class to generate from a manifest: its emmet, target directory and per-class options."""
+    emmet: str
+    location: str
+    options: dict[str, bool] = field(default_factory=dict)
+
+
+def entry_from_record(record: dict, default_location: str) -> ManifestEntry:
+    """Creates a ManifestEntry from a JSON/TOML record in the format `{"emmet": ..., "location": ..., "options": {...}}`.
+    Only `emmet` is required; `name` is accepted as an alias for it."""
+    emmet = record.get("emmet", record.get("name"))
+    if emmet is None:
+        raise ValueError(f"Manifest record {record} has no emmet.")
+    return ManifestEntry(emmet, record.get("location", default_location), dict(record.get("options", {})))
+
+
+def entry_from_line(line: str, default_location: str) -> ManifestEntry | None:
+    """Creates a ManifestEntry from a plain text manifest line in the format `{emmet} {location}`, where the location is
+    optional. Returns None for blank lines and comments (lines starting with `#`)."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = line.split(maxsplit=1)
+    location = parts[1] if len(parts) > 1 else default_location
+    return ManifestEntry(parts[0], location)
+
+
+def entry_from_stream_line(line: str, default_location: str) -> ManifestEntry | None:
+    """Creates a ManifestEntry from a line of a stream, which may either be a JSON record (JSONL) or a plain text manifest line."""
+    if line.lstrip().startswith("{"):
+        return entry_from_record(json.loads(line), default_location)
+    return entry_from_line(line, default_location)
+
+
+def load_manifest(path: str, default_location: str = ".") -> list[ManifestEntry]:
+    """Loads a manifest of classes to generate. The format is chosen by file extension:
+    `.json` (a list of records, or an object with a `classes` list), `.toml` (an array of `[[classes]]` tables),
+    anything else is read line by line, where each line is a JSON record or `{emmet} {location}`."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path) as file:
+            data = json.load(file)
+        records = data["classes"] if isinstance(data, dict) else data
+        return [entry_from_record(record, default_location) for record in records]
+    if extension == ".toml":
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+        return [entry_from_record(record, default_location) for record in data.get("classes", [])]
+    entries = []
+    with open(path) as file:
+        for line in file:
+            entry = entry_from_stream_line(line, default_location)
+            if entry is not None:
+                entries.append(entry)
+    return entries
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+import difflib
+import hashlib
+import os
+import uuid
+
+
+@dataclass(repr=True)
+class WriteStats:
+    """Class to count how many generated files were written and how many were skipped because they were unchanged."""
+    written: int = 0
+    skipped: int = 0
+
+    def add(self, written: bool | None) -> None:
+        """Counts the result of `write_if_changed`. None means no file was generated, so nothing is counted."""
+        if written is True:
+            self.written += 1
+        elif written is False:
+            self.skipped += 1
+
+
+def content_hash(contents: str) -> str:
+    """Returns the SHA-256 hash of the contents of a file, as they would be written to disk."""
+    return hashlib.sha256(contents.encode()).hexdigest()
+
+
+def file_hash(file_path: str) -> str | None:
+    """Returns the SHA-256 hash of an existing file, or None if it does not exist."""
+    try:
+        with open(file_path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def read_existing(file_path: str) -> str:
+    """Returns the contents of a file, or "" if it does not exist."""
+    try:
+        with open(file_path) as file:
+            return file.read()
+    except FileNotFoundError:
+        return ""
+
+
+def is_unchanged(file_path: str, contents: str) -> bool:
+    """Checks whether a file already exists with exactly the given contents."""
+    try:
+        # Files of a different size cannot match, so there is no need to read them
+        if os.path.getsize(file_path) != len(contents.encode()):
+            return False
+    except OSError:
+        return False
+    return file_hash(file_path) == content_hash(contents)
+
+
+def atomic_write(file_path: str, contents: str) -> None:
+    """Writes the contents to a temporary file next to the target, then moves it into place with a single `os.replace`.
+    Readers (and build systems) therefore never see a partially written file."""
+    directory, file_name = os.path.split(file_path)
+    temp_path = os.path.join(directory, f".{file_name}.{uuid.uuid4().hex}.tmp")
+    # Created with the same permissions a plain `open(file_path, "w")` would give
+    descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            file.write(contents)
+        if os.path.exists(file_path):
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_if_changed(file_path: str, contents: str) -> bool:
+    """Atomically writes the contents to the file only if they differ from what is already there, so unchanged files keep
+    their modification time. Returns whether the file was written."""
+    if is_unchanged(file_path, contents):
+        return False
+    atomic_write(file_path, contents)
+    return True
+
+
+def describe_change(file_path: str, contents: str) -> str:
+    """Describes what writing the contents to the file would do: `new`, `changed` or `unchanged`."""
+    if not os.path.exists(file_path):
+        return "new"
+    return "unchanged" if is_unchanged(file_path, contents) else "changed"
+
+
+def diff_file(file_path: str, contents: str) -> str:
+    """Returns a unified diff between the file on disk (empty if it does not exist) and the given contents."""
+    existing = read_existing(file_path)
+    return "".join(difflib.unified_diff(existing.splitlines(keepends=True), contents.splitlines(keepends=True),
+                                        file_path, file_path))
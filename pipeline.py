@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Iterable, Iterator, TextIO
+from CPPClassCreator import CPPClassCreator
+from manifest import ManifestEntry, entry_from_record, entry_from_stream_line
+from output import atomic_write, is_unchanged, read_existing
+import profiling
+
+
+def write_rendered_file(file_path: str, contents: str, options: dict[str, bool]) -> str:
+    """Writes a rendered file without prompting the user. An existing file is only overridden or appended to if the
+    matching option is set, otherwise it is left untouched. Returns whether the file was `written`, `unchanged` or `skipped`."""
+    if options["append"]:
+        atomic_write(file_path, read_existing(file_path) + contents)
+        return "written"
+    if is_unchanged(file_path, contents):
+        return "unchanged"
+    if os.path.exists(file_path) and not options["override"]:
+        return "skipped"
+    atomic_write(file_path, contents)
+    return "written"
+
+
+def generate_record(entry: ManifestEntry, options: dict[str, bool]) -> dict:
+    """Generates the files for a single class without any user interaction and returns a status record in the format
+    `{"class": ..., "location": ..., "status": "ok" | "exists" | "error", "written": [...], "unchanged": [...], "skipped": [...]}`."""
+    options = {**options, **entry.options}
+    record = {"class": None, "location": entry.location,
+              "status": "ok", "written": [], "unchanged": [], "skipped": []}
+    try:
+        if options["append"] and options["override"]:
+            raise ValueError("Cannot use append and override at the same time.")
+        creator = CPPClassCreator(entry.emmet, options)
+        record["class"] = creator.name
+        with profiling.timed(creator, "create_directory"):
+            os.makedirs(entry.location, exist_ok=True)
+        for file_name, contents in creator.iter_rendered_files():
+            file_path = f"{entry.location}/{file_name}"
+            with profiling.timed(creator, "file_io"):
+                outcome = write_rendered_file(file_path, contents, options)
+            if outcome == "written":
+                creator.profile.count("bytes_written", len(contents.encode()))
+            record[outcome].append(file_path)
+        if record["skipped"]:
+            record["status"] = "exists"
+        if profiling.ENABLED:
+            record["profile"] = creator.profile.to_dict()
+    except Exception as error:
+        record["status"] = "error"
+        record["error"] = f"{type(error).__name__}: {error}"
+    return record
+
+
+def render_record(entry: ManifestEntry) -> dict:
+    """Renders the files for a single class without writing them, returning a record in the format
+    `{"class": ..., "status": "ok" | "error", "files": {file name: contents}}`."""
+    try:
+        creator = CPPClassCreator(entry.emmet, entry.options)
+        return {"class": creator.name, "status": "ok", "files": creator.render()}
+    except Exception as error:
+        return {"class": None, "status": "error", "files": {}, "error": f"{type(error).__name__}: {error}"}
+
+
+def handle_request(request) -> dict:
+    """Handles a single generate request in the format `{"emmet": ..., "location": ..., "options": {...}, "write": bool}`.
+    If `write` is false (the default), the rendered contents are returned instead of being written to `location`, which
+    must otherwise be an absolute path, as the daemon's working directory is not the client's."""
+    try:
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object.")
+        if not isinstance(request.get("options", {}), dict):
+            raise ValueError("Request options must be a JSON object.")
+        entry = entry_from_record(request, request.get("location", "."))
+        if not isinstance(entry.emmet, str) or not isinstance(entry.location, str):
+            raise ValueError("Request emmet and location must be strings.")
+        if request.get("write", False) and not os.path.isabs(entry.location):
+            raise ValueError(f"Request location {entry.location} must be an absolute path.")
+    except ValueError as error:
+        return {"class": None, "status": "error", "error": f"{type(error).__name__}: {error}"}
+    if request.get("write", False):
+        return generate_record(entry, {"override": False, "append": False})
+    return render_record(entry)
+
+
+def generate_stream(lines: Iterable[str], options: dict[str, bool], default_location: str = ".") -> Iterator[dict]:
+    """Lazily generates each class in a stream of emmets (plain manifest lines or JSONL records), yielding a status record
+    for each class as soon as it has been written. Only one class is held in memory at a time."""
+    for line in lines:
+        try:
+            entry = entry_from_stream_line(line, default_location)
+        except ValueError as error:
+            yield {"class": None, "location": None, "status": "error",
+                   "written": [], "unchanged": [], "skipped": [], "error": f"{type(error).__name__}: {error}"}
+            continue
+        if entry is not None:
+            yield generate_record(entry, options)
+
+
+def run_stream(lines: Iterable[str], output: TextIO, options: dict[str, bool], default_location: str = ".") -> None:
+    """Generates every class read from `lines`, writing one JSON status record per class to `output`."""
+    for record in generate_stream(lines, options, default_location):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
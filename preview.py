@@ -0,0 +1,27 @@
+from CPPClassCreator import CPPClassCreator
+from manifest import ManifestEntry
+from output import describe_change, diff_file, read_existing
+
+
+def preview_entry(entry: ManifestEntry, options: dict[str, bool], show_diff: bool) -> int:
+    """Renders a class in memory and prints what generating it would do to each file, without writing anything.
+    With `show_diff`, prints a unified diff of each file instead. Returns the number of files that would change."""
+    options = {**options, **entry.options}
+    changed = 0
+    for file_name, contents in CPPClassCreator(entry.emmet, options).render().items():
+        file_path = f"{entry.location}/{file_name}"
+        if options["append"]:
+            contents = read_existing(file_path) + contents
+        change = describe_change(file_path, contents)
+        if change != "unchanged":
+            changed += 1
+        if show_diff:
+            print(diff_file(file_path, contents), end="")
+        else:
+            print(f"{file_path}: {change}")
+    return changed
+
+
+def run_preview(entries: list[ManifestEntry], options: dict[str, bool], show_diff: bool) -> int:
+    """Previews every class (see `preview_entry`), returning the total number of files that would change."""
+    return sum(preview_entry(entry, options, show_diff) for entry in entries)
@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+import json
+import sys
+import time
+from typing import Callable, Iterator, TextIO
+
+# Stage timings are only taken while profiling is enabled, so the instrumentation costs one check otherwise
+ENABLED = False
+# Called with (class name, stage, seconds) every time a stage finishes
+HOOKS: list[Callable[[str, str, float], None]] = []
+
+
+def enable() -> None:
+    """Turns on timing of every stage of class generation."""
+    global ENABLED
+    ENABLED = True
+
+
+def add_hook(hook: Callable[[str, str, float], None]) -> None:
+    """Registers a function to be called with (class name, stage, seconds) every time a stage finishes. Enables profiling."""
+    HOOKS.append(hook)
+    enable()
+
+
+def remove_hook(hook: Callable[[str, str, float], None]) -> None:
+    """Unregisters a function added with `add_hook`."""
+    HOOKS.remove(hook)
+
+
+@dataclass(repr=True)
+class ClassProfile:
+    """Class to represent the time spent in each stage of generating one class, and counters of what was generated.
+    Stages nest (e.g. `render_hpp` includes `create_method_declarations`), so their times do not add up to the total."""
+    name: str = ""
+    stages: dict[str, float] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+
+    def record(self, name: str, stage: str, seconds: float) -> None:
+        """Adds the time taken by a stage and passes it on to the registered hooks."""
+        self.name = name
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        for hook in HOOKS:
+            hook(name, stage, seconds)
+
+    def count(self, counter: str, amount: int) -> None:
+        """Increases a counter, e.g. the number of bytes written."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def to_dict(self) -> dict:
+        return {"class": self.name, "stages": self.stages, "counters": self.counters}
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator for CPPClassCreator methods that records the time taken by the method as the given stage of the class's profile."""
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not ENABLED:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.profile.record(
+                    self.name, stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timed(creator, stage: str) -> Iterator[None]:
+    """Context manager that records the time taken by its body as the given stage of a CPPClassCreator's profile."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        creator.profile.record(creator.name, stage, time.perf_counter() - start)
+
+
+def emit(profile: dict, stream: TextIO = sys.stderr) -> None:
+    """Writes a class profile (from `ClassProfile.to_dict`) as a single line of JSON."""
+    stream.write(json.dumps(profile) + "\n")
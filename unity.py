@@ -0,0 +1,89 @@
+import os
+import re
+from batch import BatchResult
+from manifest import ManifestEntry
+from output import WriteStats, write_if_changed
+
+UNITY_FILE_NAME = "unity_{index}.cpp"
+UNITY_FILE_PATTERN = re.compile(r"unity_([0-9]+)\.cpp")
+
+
+def include_path(file_path: str, location: str) -> str:
+    """Returns the path to use in an `#include` in a file in `location`, which is relative to that location."""
+    return os.path.relpath(file_path, location).replace(os.sep, "/")
+
+
+def strip_std_includes(entries: list[ManifestEntry], pch_path: str) -> None:
+    """Makes every class in the batch include the shared header in place of its std includes, using a path relative to
+    the class's location. Per-class options take precedence."""
+    for entry in entries:
+        entry.options.setdefault(
+            "pch_include", include_path(pch_path, entry.location))
+
+
+def collect_std_includes(results: list[BatchResult]) -> list[str]:
+    """Returns the std includes of every class in the batch, deduplicated in order of first use."""
+    includes = {}
+    for result in results:
+        for include in result.includes:
+            includes[include] = None
+    return list(includes)
+
+
+def render_pch(pch_path: str, includes: list[str]) -> str:
+    """Renders a header that includes every std header used by the batch, to be precompiled and shared by all of its classes."""
+    guard = re.sub(r"\W", "_", os.path.basename(pch_path)).upper()
+    lines = [f"#ifndef {guard}\n", f"#define {guard}\n\n"]
+    for include in includes:
+        lines.append(include + "\n")
+    lines.append("\n#endif")
+    return "".join(lines)
+
+
+def render_unity_files(results: list[BatchResult], chunk_size: int, location: str) -> dict[str, str]:
+    """Renders unity translation units in `location`, each including up to `chunk_size` of the batch's generated `.cpp`
+    files in batch order. Classes without a `.cpp` (templates and classes with only inline accessors) are left out.
+    Returns a mapping of file path to contents."""
+    sources = [os.path.join(result.location, f"{result.name}.cpp")
+               for result in results if f"{result.name}.cpp" in result.files]
+    unity_files = {}
+    for index, start in enumerate(range(0, len(sources), chunk_size)):
+        file_path = os.path.join(location, UNITY_FILE_NAME.format(index=index))
+        unity_files[file_path] = "".join(f"#include \"{include_path(source, location)}\"\n"
+                                         for source in sources[start:start + chunk_size])
+    return unity_files
+
+
+def remove_stale_unity_files(location: str, count: int) -> int:
+    """Removes the unity translation units in `location` numbered `count` or above, left by an earlier run of a larger
+    batch or with a smaller `unity` option. Returns how many were removed."""
+    if not os.path.isdir(location):
+        return 0
+    removed = 0
+    for file_name in os.listdir(location):
+        match = UNITY_FILE_PATTERN.fullmatch(file_name)
+        if match and int(match.group(1)) >= count:
+            os.remove(os.path.join(location, file_name))
+            removed += 1
+    return removed
+
+
+def write_build_files(results: list[BatchResult], options: dict, location: str) -> None:
+    """Writes the shared precompiled header (`pch` option) and the unity translation units (`unity` option, the number
+    of classes in each) for a batch, from the results of generating it. Files whose contents are unchanged are not
+    rewritten, and unity translation units beyond the new number are removed."""
+    files = {}
+    if options["pch"] is not None:
+        files[options["pch"]] = render_pch(
+            options["pch"], collect_std_includes(results))
+    if options["unity"] is not None:
+        unity_files = render_unity_files(results, options["unity"], location)
+        removed = remove_stale_unity_files(location, len(unity_files))
+        if removed:
+            print(f"Removed {removed} stale unity files")
+        files.update(unity_files)
+    stats = WriteStats()
+    for file_path, contents in files.items():
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        stats.add(write_if_changed(file_path, contents))
+    print(f"Wrote {stats.written} build files, skipped {stats.skipped} unchanged build files")